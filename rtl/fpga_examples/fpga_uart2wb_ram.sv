@@ -14,7 +14,8 @@ module fpga_uart2wb_ram #(
     parameter ADDR_BYTE = 1,
     parameter DATA_BYTE = 2,
     parameter BAUD_RATE = 115200,
-    parameter CLK_FREQ  = 100
+    parameter CLK_FREQ  = 100,
+    parameter BAUD_FRAC = 0
 ) (
     input  logic clk,
     input  logic rst_n,
@@ -44,7 +45,8 @@ module fpga_uart2wb_ram #(
         .ADDR_BYTE(ADDR_BYTE),
         .DATA_BYTE(DATA_BYTE),
         .BAUD_RATE(BAUD_RATE),
-        .CLK_FREQ (CLK_FREQ)
+        .CLK_FREQ (CLK_FREQ),
+        .BAUD_FRAC(BAUD_FRAC)
     ) u_uart2wb (
         .clk        (clk),
         .rst_n      (rst_n),
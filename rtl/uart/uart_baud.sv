@@ -13,33 +13,76 @@
 // The TX module use 16 over-sampling and a 2/3 majority vote to determine the input value.
 // it sample the input RX at 6, 8, 10-th sample to get the 3 value for majority vote.
 // Because of that, the baud module will generate pulse for 6/8/10th and 16th sample
+//
+// FRAC = 0: Integer divider. Each sample takes cfg_div[15:4] clock cycles.
+// FRAC > 0: Fractional divider. cfg_div is a fixed point number with FRAC fractional bits,
+//           cfg_div = F_clk/F_baud * 2^FRAC. Each sample takes cfg_div / 16 clock cycles, i.e.
+//           cfg_div[15+FRAC:4+FRAC] or cfg_div[15+FRAC:4+FRAC] + 1 cycles. An accumulator adds the
+//           fractional part cfg_div[3+FRAC:0] on each sample and the carry adds the extra cycle,
+//           so the average bit time is exact within 2^-FRAC clock cycle.
 // -------------------------------------------------------------------
 
-module uart_baud (
-    input  logic        clk,
-    input  logic        rst_n,
-    input  logic [15:0] cfg_div,            // cfg_div = F_clk/F_baud - 1
-    input  logic        clear,              // Clear the clock divider counter and start a new sampling.
-    output logic        baud_sample_6th,    // 6th sampling of the total 16 sampling
-    output logic        baud_sample_8th,    // 8th sampling of the total 16 sampling
-    output logic        baud_sample_10th,   // 10th sampling of the total 16 sampling
-    output logic        baud_sample_16th    // 16th sampling of the total 16 sampling
+module uart_baud #(
+    parameter FRAC = 0                      // number of fractional bits in cfg_div
+) (
+    input  logic            clk,
+    input  logic            rst_n,
+    input  logic [15+FRAC:0] cfg_div,       // FRAC = 0: cfg_div = F_clk/F_baud - 1. FRAC > 0: cfg_div = F_clk/F_baud * 2^FRAC
+    input  logic            clear,          // Clear the clock divider counter and start a new sampling.
+    output logic            baud_sample_6th,    // 6th sampling of the total 16 sampling
+    output logic            baud_sample_8th,    // 8th sampling of the total 16 sampling
+    output logic            baud_sample_10th,   // 10th sampling of the total 16 sampling
+    output logic            baud_sample_16th    // 16th sampling of the total 16 sampling
 );
 
     logic        tick;
     logic [11:0] counter;       // number of clock cycle for each sample
     logic [3:0]  sample_count;
 
+    generate
+    if (FRAC == 0) begin: gen_int
 
-    always_ff @(posedge clk) begin
-        if (!rst_n) begin
-            counter <= 12'b0;
+        always_ff @(posedge clk) begin
+            if (!rst_n) begin
+                counter <= 12'b0;
+            end
+            else begin
+                if (clear || tick) counter <= cfg_div[15:4];
+                else counter <= counter - 1'b1;
+            end
         end
-        else begin
-            if (clear || tick) counter <= cfg_div[15:4];
-            else counter <= counter - 1'b1;
+
+    end
+    else begin: gen_frac
+
+        logic [FRAC+3:0] acc;   // fractional part of the sample time
+        logic            carry;
+        logic [FRAC+3:0] acc_next;
+
+        assign {carry, acc_next} = acc + cfg_div[FRAC+3:0];
+
+        always_ff @(posedge clk) begin
+            if (!rst_n) begin
+                counter <= 12'b0;
+                acc <= '0;
+            end
+            else begin
+                if (clear) begin
+                    counter <= cfg_div[15+FRAC:4+FRAC];
+                    acc <= '0;
+                end
+                else if (tick) begin
+                    counter <= cfg_div[15+FRAC:4+FRAC] + carry;
+                    acc <= acc_next;
+                end
+                else begin
+                    counter <= counter - 1'b1;
+                end
+            end
         end
+
     end
+    endgenerate
 
     always_ff @(posedge clk) begin
         if (!rst_n) begin
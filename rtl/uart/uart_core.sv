@@ -10,11 +10,13 @@
 // uart_core: Uart TX + Uart RX
 // -------------------------------------------------------------------
 
-module uart_core (
+module uart_core #(
+    parameter FRAC = 0     // number of fractional bits in cfg_div. See uart_baud
+) (
     input           clk,
     input           rst_n,
 
-    input [15:0]    cfg_div,
+    input [15+FRAC:0] cfg_div,
     input           cfg_txen,
     input           cfg_rxen,
     input           cfg_nstop,
@@ -33,7 +35,7 @@ module uart_core (
     //  Module instantiation
     // --------------------------------------------
 
-    uart_tx u_uart_tx(.*);
-    uart_rx u_uart_rx(.*);
+    uart_tx #(.FRAC(FRAC)) u_uart_tx(.*);
+    uart_rx #(.FRAC(FRAC)) u_uart_rx(.*);
 
 endmodule
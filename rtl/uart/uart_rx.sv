@@ -10,10 +10,12 @@
 // uart_rx: UART Receiver module
 // -------------------------------------------------------------------
 
-module uart_rx (
+module uart_rx #(
+    parameter FRAC = 0     // number of fractional bits in cfg_div. See uart_baud
+) (
     input  logic        clk,
     input  logic        rst_n,
-    input  logic [15:0] cfg_div,
+    input  logic [15+FRAC:0] cfg_div,
     input  logic        cfg_rxen,
     input  logic        cfg_nstop,
     output logic        rx_valid,
@@ -157,7 +159,7 @@ module uart_rx (
     //  Module instantiation
     // --------------------------------------------
 
-    uart_baud u_uart_baud(
+    uart_baud #(.FRAC(FRAC)) u_uart_baud(
         .clk                (clk             ),
         .rst_n              (rst_n           ),
         .cfg_div            (cfg_div         ),
@@ -10,11 +10,13 @@
 // uart_tx: UART Transmit module
 // -------------------------------------------------------------------
 
-module uart_tx (
+module uart_tx #(
+    parameter FRAC = 0     // number of fractional bits in cfg_div. See uart_baud
+) (
     input  logic        clk,
     input  logic        rst_n,
 
-    input  logic [15:0] cfg_div,
+    input  logic [15+FRAC:0] cfg_div,
     input  logic        cfg_txen,
     input  logic        cfg_nstop,
 
@@ -140,7 +142,7 @@ module uart_tx (
     //  Module instantiation
     // --------------------------------------------
 
-    uart_baud u_uart_baud(
+    uart_baud #(.FRAC(FRAC)) u_uart_baud(
         .clk                (clk),
         .rst_n              (rst_n),
         .cfg_div            (cfg_div),
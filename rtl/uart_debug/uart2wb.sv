@@ -10,6 +10,8 @@
 // uart2wb: UART to Wishbone
 // - Use UART as a host interface to read/write on-chip memory
 // - Wishbone B4 pipeline protocol
+// - Compressed write (run length encoded) expands into sequential writes
+// - One byte RX holding register, so a byte can arrive while the bus is accessed
 // -------------------------------------------------------------------
 
 module uart2wb #(
@@ -17,6 +19,7 @@ module uart2wb #(
     parameter DATA_BYTE = 2,        // number of data byte
     parameter BAUD_RATE = 115200,   // baud rate
     parameter CLK_FREQ  = 100,      // clock frequency
+    parameter BAUD_FRAC = 0,        // fractional bits of the baud divider. 0 = integer divider
     parameter AW = 8 * ADDR_BYTE,
     parameter DW = 8 * DATA_BYTE
 ) (
@@ -47,7 +50,10 @@ module uart2wb #(
 // Signal Declaration
 /////////////////////////////////////////////////
 
-localparam DIV = (CLK_FREQ * 1000000) / BAUD_RATE - 1;
+localparam [63:0] CLK_HZ = CLK_FREQ * 64'd1000000;
+// integer divider: F_clk/F_baud - 1. fractional divider: F_clk/F_baud * 2^BAUD_FRAC (rounded)
+localparam [63:0] DIV = (BAUD_FRAC == 0) ? CLK_HZ / BAUD_RATE - 1 :
+                        ((CLK_HZ << BAUD_FRAC) + BAUD_RATE / 2) / BAUD_RATE;
 
 typedef enum logic [3:0] {
     IDLE,
@@ -55,13 +61,16 @@ typedef enum logic [3:0] {
     DATA,   // receive data from Uart
     ACCESS, // access the bus
     READ,   // Wait for the read data
-    SEND    // send back the data to Uart
+    SEND,   // send back the data to Uart
+    RUN,    // receive the run header of the compressed write
+    NEXT    // wait for the write ack and move to the next word of the run
 } state_t;
 
 typedef enum logic [7:0] {
     CMD_NOP   = 8'h00,  // NOP
     CMD_READ  = 8'h01,  // single read
     CMD_WRITE = 8'h02,  // single write
+    CMD_ZWRITE= 8'h03,  // compressed write
     CMD_RST_A = 8'hFE,  // reset assertion
     CMD_RST_D = 8'hFF   // reset de-assertion
 } cmd_t;
@@ -70,11 +79,12 @@ typedef enum logic [7:0] {
 state_t         state, state_next;
 cmd_t           cmd;
 logic           write_cmd;
+logic           zwrite_cmd;
 logic           rst_cmd;
 
 logic           wb_act; // bus action
 
-logic [15:0]    cfg_div;
+logic [15+BAUD_FRAC:0] cfg_div;
 logic           cfg_txen;
 logic           cfg_rxen;
 logic           cfg_nstop;
@@ -84,6 +94,13 @@ logic           tx_ready;
 logic           rx_valid;
 logic [7:0]     rx_data;
 
+// one byte holding register for the byte received while the bus is accessed
+logic           rx_take;        // state machine is taking a byte from uart
+logic           rx_pend;
+logic [7:0]     rx_hold;
+logic           rx_byte_valid;
+logic [7:0]     rx_byte;
+
 logic           last_addr_byte;
 logic           last_data_byte;
 
@@ -94,6 +111,11 @@ logic [$clog2(DATA_BYTE+1)-1:0] send_cnt;
 logic [DATA_BYTE-1:0][7:0]      read_data;      // read data;
 logic                           last_send;
 
+// compressed write: run header = {repeat, length}. length = 0 ends the command
+logic                           run_rep;        // repeat the same word
+logic [6:0]                     run_len;        // remaining words of the run
+logic                           last_run;
+
 /////////////////////////////////////////////////
 // signal declaration
 /////////////////////////////////////////////////
@@ -112,21 +134,23 @@ always @(*) begin
     state_next = state;
     case (state)
         IDLE: begin
-            if (rx_valid & !rst_cmd) state_next = ADDR;
+            if (rx_byte_valid & !rst_cmd) state_next = ADDR;
         end
         ADDR: begin
-            if (rx_valid && last_addr_byte) begin
-                if (write_cmd) state_next = DATA;
-                else           state_next = ACCESS;
+            if (rx_byte_valid && last_addr_byte) begin
+                if      (write_cmd)  state_next = DATA;
+                else if (zwrite_cmd) state_next = RUN;
+                else                 state_next = ACCESS;
             end
         end
         DATA: begin
-            if (rx_valid && last_data_byte) state_next = ACCESS;
+            if (rx_byte_valid && last_data_byte) state_next = ACCESS;
         end
         ACCESS: begin
-            // assuming action will complete before the next command arrives
-            if      (wb_act &&  wb_we_o) state_next = IDLE;
-            else if (wb_act && !wb_we_o) state_next = READ;
+            // a byte received during the access is kept in rx_hold
+            if      (wb_act && zwrite_cmd) state_next = NEXT;
+            else if (wb_act &&  wb_we_o)   state_next = IDLE;
+            else if (wb_act && !wb_we_o)   state_next = READ;
         end
         READ: begin
             state_next = SEND;
@@ -134,12 +158,48 @@ always @(*) begin
         SEND: begin
             if (tx_valid && tx_ready && last_send) state_next = IDLE;
         end
+        RUN: begin
+            if (rx_byte_valid) begin
+                if (rx_byte[6:0] == 0) state_next = IDLE;
+                else                   state_next = DATA;
+            end
+        end
+        NEXT: begin
+            // the byte received meanwhile is kept in rx_hold
+            if (wb_ack_i) begin
+                if      (last_run) state_next = RUN;
+                else if (run_rep)  state_next = ACCESS;
+                else               state_next = DATA;
+            end
+        end
     endcase
 end
 
 assign wb_act = wb_cyc_o & wb_stb_o & ~wb_stall_i;
 assign last_addr_byte = (addr_cnt == 0);
 assign last_data_byte = (data_cnt == 0);
+assign last_run = (run_len == 1);
+
+// Hold the byte received while the state machine is not taking bytes (e.g. during a repeat run)
+// Bytes received while sending the read data are dropped
+assign rx_take = (state == IDLE) | (state == ADDR) | (state == DATA) | (state == RUN);
+assign rx_byte_valid = rx_valid | rx_pend;
+assign rx_byte = rx_pend ? rx_hold : rx_data;
+
+always @(posedge clk) begin
+    if (!rst_n) begin
+        rx_pend <= 1'b0;
+    end
+    else begin
+        if (rx_valid && (rx_pend || !rx_take) && state != SEND) begin
+            rx_pend <= 1'b1;
+            rx_hold <= rx_data;
+        end
+        else if (rx_take) begin
+            rx_pend <= 1'b0;
+        end
+    end
+end
 
 // Receive command from Uart
 always @(posedge clk) begin
@@ -147,8 +207,8 @@ always @(posedge clk) begin
         cmd <= CMD_NOP;
     end
     else begin
-        if (state == IDLE && rx_valid) begin
-            cmd <= cmd_t'(rx_data);
+        if (state == IDLE && rx_byte_valid) begin
+            cmd <= cmd_t'(rx_byte);
         end
     end
 end
@@ -163,32 +223,48 @@ always @(posedge clk) begin
             data_cnt <= DATA_BYTE - 1;
         end
         ADDR: begin
-            if (rx_valid) begin
+            if (rx_byte_valid) begin
                 if (ADDR_BYTE > 1)
-                    wb_adr_o <= {rx_data, wb_adr_o[8*ADDR_BYTE-1:8]};
+                    wb_adr_o <= {rx_byte, wb_adr_o[8*ADDR_BYTE-1:8]};
                 else
-                    wb_adr_o <= rx_data;
+                    wb_adr_o <= rx_byte;
                 addr_cnt <= addr_cnt - 1'b1;
             end
         end
         DATA: begin
-            if (rx_valid) begin
+            if (rx_byte_valid) begin
                 if (DATA_BYTE > 1)
-                    wb_dat_o <= {rx_data, wb_dat_o[8*DATA_BYTE-1:8]};
+                    wb_dat_o <= {rx_byte, wb_dat_o[8*DATA_BYTE-1:8]};
                 else
-                    wb_dat_o <= rx_data;
+                    wb_dat_o <= rx_byte;
                 data_cnt <= data_cnt - 1'b1;
             end
         end
         READ: read_data <= wb_dat_i;
+        RUN: begin
+            data_cnt <= DATA_BYTE - 1;
+            if (rx_byte_valid) begin
+                run_rep <= rx_byte[7];
+                run_len <= rx_byte[6:0];
+            end
+        end
+        NEXT: begin
+            // address is a byte address
+            data_cnt <= DATA_BYTE - 1;
+            if (wb_ack_i) begin
+                wb_adr_o <= wb_adr_o + DATA_BYTE;
+                run_len <= run_len - 1'b1;
+            end
+        end
     endcase
 end
 
 
-assign rst_cmd   = (rx_data == CMD_RST_A) |
-                   (rx_data == CMD_RST_D) ;
+assign rst_cmd   = (rx_byte == CMD_RST_A) |
+                   (rx_byte == CMD_RST_D) ;
 
 assign write_cmd = cmd == CMD_WRITE;
+assign zwrite_cmd = cmd == CMD_ZWRITE;
 
 // Wishbone bus logic
 always @(posedge clk) begin
@@ -205,6 +281,7 @@ always @(posedge clk) begin
             wb_stb_o <= 1'b1;
             case(cmd)
                 CMD_WRITE: wb_we_o <= 1'b1;
+                CMD_ZWRITE:wb_we_o <= 1'b1;
                 CMD_READ:  wb_we_o <= 1'b0;
             endcase
         end
@@ -237,12 +314,12 @@ assign tx_data   = read_data[send_cnt];
 assign last_send = send_cnt == DATA_BYTE - 1;
 
 // uart core
-assign cfg_div = DIV[15:0];
+assign cfg_div = DIV[15+BAUD_FRAC:0];
 assign cfg_txen = enable;
 assign cfg_rxen = enable;
 assign cfg_nstop = 0;
 
-uart_core
+uart_core #(.FRAC(BAUD_FRAC))
 u_uart_core (.*);
 
 endmodule
@@ -10,9 +10,13 @@
 # Environment
 # -------------------------------------------------------------------
 
+import os
+import json
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
+from contextlib import contextmanager
+from cocotb.triggers import RisingEdge, Timer, Edge, ReadWrite
 from cocotb.clock import Clock
+from cocotb.utils import get_sim_time
 
 async def generate_reset(dut):
     """
@@ -23,7 +27,7 @@ async def generate_reset(dut):
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
 
-async def init(dut, period=10, baud=115200):
+async def init(dut, period=10, baud=115200, frac=0, ppm=0):
     """
     Initialize the environment:
         - setup clock, and reset the design
@@ -32,6 +36,9 @@ async def init(dut, period=10, baud=115200):
     Parameter:
         - period (int): Clock Period in ns
         - baud (int): Baud rate
+        - frac (int): Number of fractional bits of cfg_div (FRAC parameter of the design)
+        - ppm (int): Clock frequency offset in ppm. cfg_div is still calculated from the nominal period.
+                     The clock period is in fs, set COCOTB_HDL_TIMEPRECISION = 1fs in the Makefile.
     """
     # Set default signal value
     dut.tx_valid.value = 0
@@ -39,7 +46,128 @@ async def init(dut, period=10, baud=115200):
     dut.cfg_txen.value = 1
     dut.cfg_rxen.value = 1
     dut.cfg_nstop.value = 0
-    dut.cfg_div.value = int(1000000000 / (baud * period))
+    if frac:
+        dut.cfg_div.value = round(1000000000 * 2**frac / (baud * period))
+    else:
+        dut.cfg_div.value = int(1000000000 / (baud * period))
     # clock and reset
-    cocotb.start_soon(Clock(dut.clk, period, units = 'ns').start()) # clock
+    if ppm:
+        # actual clock period in fs, rounded to even so both half periods are equal.
+        # A ps period would only give 200 ppm steps at 10 ns.
+        period_fs = 2 * round(period * 1000000 / (1 + ppm / 1000000) / 2)
+        actual = (period * 1000000 / period_fs - 1) * 1000000
+        dut._log.info(f"Clock period {period_fs} fs: {actual:+.1f} ppm (requested {ppm:+} ppm)")
+        cocotb.start_soon(Clock(dut.clk, period_fs, units = 'fs').start()) # clock
+    else:
+        cocotb.start_soon(Clock(dut.clk, period, units = 'ns').start()) # clock
     await generate_reset(dut)
+
+class WaveWindow:
+    """
+    Trigger windowed waveform capture (WAVES_WINDOW = 1, see waves.mk)
+    Dumping starts off and is turned on for a window around each trigger so the
+    wave file only covers the interesting part of a long test.
+    - trigger()/watch() turn dumping on for `post` ns after the trigger.
+    - A waveform can't be dumped backward in time, so the `pre` part of the window is
+      captured by re-running the test with the same seed and WAVE_REPLAY pointing to the
+      saved window file. The replay turns dumping on at (trigger - pre).
+    All the methods are no-op when the design is not built with wave_dump.
+    """
+
+    def __init__(self, dut, pre=10000, post=10000):
+        """
+        Parameter:
+            - pre (int): Time captured before the trigger in ns (replay only)
+            - post (int): Time captured after the trigger in ns
+        """
+        from cocotb import simulator
+        from cocotb.handle import SimHandle
+        self.dut = dut
+        self.pre = pre
+        self.post = post
+        self.windows = []   # (start, end, reason) in ns
+        self.off_time = 0
+        self.off_task = None
+        handle = simulator.get_root_handle('wave_dump')
+        self.ctrl = SimHandle(handle) if handle else None
+        self.file = os.environ.get('WAVE_WINDOW_FILE', 'waves_window.json')
+        self.replay = bool(self.ctrl and os.environ.get('WAVE_REPLAY'))
+        if self.replay:
+            with open(os.environ['WAVE_REPLAY'], 'r') as FH:
+                windows = json.load(FH)
+            cocotb.start_soon(self._replay(windows))
+
+    async def _replay(self, windows):
+        for start, end, reason in windows:
+            now = get_sim_time('ns')
+            if start > now:
+                await Timer(start - now, units='ns')
+            self.dut._log.info(f"[WaveWindow] replay window {start} - {end} ns: {reason}")
+            self.ctrl.dump_en.value = 1
+            await Timer(max(end - get_sim_time('ns'), 1), units='ns')
+            self.ctrl.dump_en.value = 0
+
+    async def _auto_off(self):
+        while get_sim_time('ns') < self.off_time:
+            await Timer(self.off_time - get_sim_time('ns'), units='ns')
+        self.ctrl.dump_en.value = 0
+        self.off_task = None
+
+    def trigger(self, reason=''):
+        """
+        Capture the waveform from now to now + post. Overlapping windows are merged.
+        """
+        if not self.ctrl:
+            return
+        now = get_sim_time('ns')
+        start = max(now - self.pre, 0)
+        self.off_time = now + self.post
+        if self.windows and start <= self.windows[-1][1]:
+            self.windows[-1][1] = self.off_time
+        else:
+            self.dut._log.info(f"[WaveWindow] trigger at {now} ns: {reason}")
+            self.windows.append([start, self.off_time, reason])
+        # the replay drives dump_en from the saved windows
+        if self.replay:
+            return
+        self.ctrl.dump_en.value = 1
+        if not self.off_task:
+            self.off_task = cocotb.start_soon(self._auto_off())
+
+    async def watch(self, signal, value=1, reason=None):
+        """
+        Trigger every time signal changes to value
+        """
+        if not self.ctrl:
+            return
+        reason = reason or f"{signal._name} == {value}"
+        while True:
+            await Edge(signal)
+            await ReadWrite()
+            if signal.value == value:
+                self.trigger(reason)
+
+    def save(self):
+        """
+        Save the capture windows so the test can be re-run with WAVE_REPLAY
+        """
+        if not self.ctrl or not self.windows or self.replay:
+            return
+        with open(self.file, 'w') as FH:
+            json.dump(self.windows, FH)
+        self.dut._log.info(f"[WaveWindow] {len(self.windows)} windows saved to {self.file}. "
+                           f"Re-run with RANDOM_SEED={cocotb.RANDOM_SEED} WAVE_REPLAY={os.path.abspath(self.file)} "
+                           f"to capture {self.pre} ns before each trigger")
+
+    @contextmanager
+    def guard(self):
+        """
+        Trigger a window when the wrapped code fails (assertion or exception)
+        """
+        try:
+            yield self
+        except BaseException:
+            self.trigger('failure')
+            raise
+        finally:
+            self.save()
@@ -0,0 +1,128 @@
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# uart2wb reference model
+# Byte level model of the uart2wb protocol. Predicts the wishbone
+# requests, the read data sent back to the host and rst_n_out.
+# The compressed write expands each run into sequential writes.
+# -------------------------------------------------------------------
+
+CMD_READ  = 0x01
+CMD_WRITE = 0x02
+CMD_ZWRITE = 0x03
+CMD_RST_A = 0xFE
+CMD_RST_D = 0xFF
+
+class Uart2wbModel:
+
+    def __init__(self, abyte=2, dbyte=2):
+        """
+        Args:
+            abyte: number of address byte
+            dbyte: number of data byte
+        """
+        self.abyte = abyte
+        self.dbyte = dbyte
+        self.mem = {}
+        self.rst_n_out = 1
+        self.bus = []       # expected wishbone requests: (we, addr, data)
+        self.state = 'IDLE'
+        self.cmd = 0
+        self.buf = []
+        self.addr = 0       # compressed write: address of the next word
+        self.run = (0, 0)   # compressed write: (repeat, remaining words) of the current run
+
+    def encode(self, cmd, addr=0, data=0):
+        """
+        Encode a command into the bytes sent by the host. Address and data are LSB first.
+        data of the compressed write is the encoded runs (bytes).
+        """
+        if cmd in (CMD_RST_A, CMD_RST_D):
+            return [cmd]
+        out = [cmd] + [(addr >> (8*i)) & 0xFF for i in range(self.abyte)]
+        if cmd == CMD_ZWRITE:
+            out += list(data)
+        if cmd == CMD_WRITE:
+            out += [(data >> (8*i)) & 0xFF for i in range(self.dbyte)]
+        return out
+
+    def receive(self, byte):
+        """
+        Process a byte received from the host.
+        Return the bytes sent back to the host (LSB first), empty list if nothing is sent.
+        """
+        if self.state == 'IDLE':
+            if byte in (CMD_RST_A, CMD_RST_D):
+                self.rst_n_out = 0 if byte == CMD_RST_A else 1
+                return []
+            self.cmd = byte
+            self.buf = []
+            self.state = 'ADDR'
+            return []
+        if self.state == 'RUN':
+            if byte & 0x7F == 0:
+                self.state = 'IDLE'
+            else:
+                self.run = (byte >> 7, byte & 0x7F)
+                self.buf = []
+                self.state = 'ZDATA'
+            return []
+        if self.state == 'ZDATA':
+            self._zdata(byte)
+            return []
+        self.buf.append(byte)
+        nbyte = self.abyte + (self.dbyte if self.cmd == CMD_WRITE else 0)
+        if len(self.buf) < nbyte:
+            return []
+        self.state = 'IDLE'
+        addr = sum(b << (8*i) for i, b in enumerate(self.buf[:self.abyte]))
+        if self.cmd == CMD_ZWRITE:
+            self.addr = addr
+            self.state = 'RUN'
+            return []
+        if self.cmd == CMD_WRITE:
+            data = sum(b << (8*i) for i, b in enumerate(self.buf[self.abyte:]))
+            self.mem[addr] = data
+            self.bus.append((1, addr, data))
+            return []
+        # any command other than write is a read in uart2wb
+        data = self.mem.get(addr, 0)
+        self.bus.append((0, addr, data))
+        return [(data >> (8*i)) & 0xFF for i in range(self.dbyte)]
+
+    def _zdata(self, byte):
+        """
+        Receive a data byte of a compressed write run and write the completed words
+        """
+        self.buf.append(byte)
+        if len(self.buf) < self.dbyte:
+            return
+        data = sum(b << (8*i) for i, b in enumerate(self.buf))
+        self.buf = []
+        repeat, num = self.run
+        for _ in range(num if repeat else 1):
+            self.mem[self.addr] = data
+            self.bus.append((1, self.addr, data))
+            # address is a byte address
+            self.addr = (self.addr + self.dbyte) & ((1 << (8*self.abyte)) - 1)
+        num = 0 if repeat else num - 1
+        self.run = (repeat, num)
+        if num == 0:
+            self.state = 'RUN'
+
+    def execute(self, cmd, addr=0, data=0):
+        """
+        Process a whole command. Return the read data for read command, None otherwise.
+        """
+        rsp = []
+        for byte in self.encode(cmd, addr, data):
+            rsp += self.receive(byte)
+        if rsp:
+            return sum(b << (8*i) for i, b in enumerate(rsp))
+        return None
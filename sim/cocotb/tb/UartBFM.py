@@ -10,21 +10,43 @@
 # UART BFM: act as a UART Host device
 # -------------------------------------------------------------------
 
+import random
 from cocotb.triggers import FallingEdge, Timer, ReadWrite
 
 class UartBFM:
 
-    def __init__(self, baud, nstop=1, info=True):
+    def __init__(self, baud, nstop=1, info=True, ppm=0, jitter=0, stop_len=None, strict=True):
         """
         Args:
             baud : baud rate
             nstop: number of stop bit. 1 - 1 bit, 2 - 2 bit
+            ppm: baud rate offset of the BFM in ppm (positive = faster)
+            jitter: max jitter of each transmitted bit edge in ns, uniform in [-jitter, jitter]
+            stop_len: length of the transmitted stop bits in bit time (can be fractional). Defaults to nstop
+            strict: assert on framing error when receiving. If False, count them in frame_errors
         """
         self.baud = baud
         self.nstop = nstop
         self.info = info
+        self.jitter = jitter
+        self.stop_len = nstop if stop_len is None else stop_len
+        self.strict = strict
+        self.frame_errors = 0
         # time interval for each uart transfer bit (in ns)
         self.interval = int(1000000000 / baud)
+        # exact bit time (in ps) including the ppm offset, used for the timing
+        self.bit_ps = 1e12 / (baud * (1 + ppm / 1000000))
+
+    async def _wait_edge(self, elapsed, target):
+        """
+        Wait until target ps from the start of the frame. Return the new elapsed time.
+        The edges are placed from the start of the frame so the rounding error does not accumulate.
+        """
+        target = round(target)
+        if target > elapsed:
+            await Timer(target - elapsed, units="ps")
+            return target
+        return elapsed
 
     def connect(self, clk, txd, rxd):
         """
@@ -43,19 +65,25 @@ class UartBFM:
         # start condition
         await ReadWrite()
         self.rxd.value = 0
-        await Timer(self.interval, units="ns")
+        elapsed = 0
         # send data, LSb is send first
-        for _ in range(8):
+        for i in range(1, 9):
+            elapsed = await self._wait_edge(elapsed, i * self.bit_ps + self._jitter())
             self.rxd.value = byte & 0x1
             byte = byte >> 1
-            await Timer(self.interval, units="ns")
         # stop condition
-        for _ in range(self.nstop):
-            self.rxd.value = 1
-            await Timer(self.interval, units="ns")
+        elapsed = await self._wait_edge(elapsed, 9 * self.bit_ps + self._jitter())
+        self.rxd.value = 1
+        await self._wait_edge(elapsed, (9 + self.stop_len) * self.bit_ps)
         if self.info:
             self.txd._log.info("[UART BFM] Complete sending byte")
 
+    def _jitter(self):
+        """
+        Random jitter of a bit edge in ps
+        """
+        return random.uniform(-self.jitter, self.jitter) * 1000 if self.jitter else 0
+
     async def receive(self, data_list=None, debug=False):
         """
         Receive a byte through Uart
@@ -68,19 +96,22 @@ class UartBFM:
         await FallingEdge(self.txd)
         if self.info:
             self.rxd._log.info(f"[UartBFM] Start receiving data")
-        # move the sample point to the center of a transfer
-        await Timer(self.interval/2, units='ns')
+        # sample at the center of each bit
+        elapsed = 0
         # Receive the data, LSb is received first
-        for _ in range(8):
-            await Timer(self.interval, units='ns')
+        for i in range(1, 9):
+            elapsed = await self._wait_edge(elapsed, (i + 0.5) * self.bit_ps)
             bit = self.txd.value.integer
             data = (data >> 1) | (bit << 7)
             if debug:
-                self.txd._log.info(f"[UartBFM] Received bit {_}: {bit}")
+                self.txd._log.info(f"[UartBFM] Received bit {i-1}: {bit}")
         # stop condition
-        for _ in range(self.nstop):
-            await Timer(self.interval, units='ns')
-            assert(self.txd.value.integer)
+        for i in range(9, 9 + self.nstop):
+            elapsed = await self._wait_edge(elapsed, (i + 0.5) * self.bit_ps)
+            if self.strict:
+                assert(self.txd.value.integer)
+            elif not self.txd.value.integer:
+                self.frame_errors += 1
         if data_list != None:
             data_list.append(data)
         if self.info:
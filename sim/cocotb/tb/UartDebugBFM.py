@@ -24,7 +24,8 @@ class UartDebugBFM:
             abyte: number of address byte
             dbyte: number of data byte
         """
-        uart_bfm.rxd._log.info(f"[UartHost] Write Cmd: Write to address {hex(addr)} with data {hex(data)}")
+        if uart_bfm.info:
+            uart_bfm.rxd._log.info(f"[UartHost] Write Cmd: Write to address {hex(addr)} with data {hex(data)}")
         # send command
         await uart_bfm.send(0x2)
         # send address, LSB send first
@@ -39,6 +40,27 @@ class UartDebugBFM:
             await uart_bfm.send(byte)
             data = data >> 8
 
+    async def zwrite_cmd(uart_bfm, addr, runs, abyte=2):
+        """
+        Perform compressed write command.
+
+        Args:
+            addr: start address
+            runs: run length encoded image, including the end header (see compress_image in UartDebug.py)
+            abyte: number of address byte
+        """
+        if uart_bfm.info:
+            uart_bfm.rxd._log.info(f"[UartHost] Compressed Write Cmd: Write {len(runs)} bytes of runs to address {hex(addr)}")
+        # send command
+        await uart_bfm.send(0x3)
+        # send address, LSB send first
+        for _ in range(abyte):
+            byte = addr & 0xFF
+            await uart_bfm.send(byte)
+            addr = addr >> 8
+        for byte in runs:
+            await uart_bfm.send(byte)
+
     async def read_cmd(uart_bfm, addr, abyte=2, dbyte=2):
         """
         Perform read command.
@@ -47,7 +69,8 @@ class UartDebugBFM:
             abyte: number of address byte
             dbyte: number of data byte
         """
-        uart_bfm.txd._log.info(f"[Host] Read Cmd: Read address {hex(addr)}")
+        if uart_bfm.info:
+            uart_bfm.txd._log.info(f"[Host] Read Cmd: Read address {hex(addr)}")
         # start parallel process to receive the data from Uart TX
         # as there are some time mismatch for the uart transaction between the testbench and the RTL
         receive_proc = cocotb.start_soon(uart_bfm.receive())
@@ -64,8 +87,10 @@ class UartDebugBFM:
         for i in range(dbyte):
             _data = await receive_proc
             data = data | (_data << (8*i))
-            receive_proc = cocotb.start_soon(uart_bfm.receive())
-        uart_bfm.txd._log.info(f"[UartHost] Read Cmd: Read complete. Got data {hex(data)}")
+            if i < dbyte - 1:
+                receive_proc = cocotb.start_soon(uart_bfm.receive())
+        if uart_bfm.info:
+            uart_bfm.txd._log.info(f"[UartHost] Read Cmd: Read complete. Got data {hex(data)}")
         return data
 
     async def rst_cmd(uart_bfm, rst=True):
@@ -74,6 +99,7 @@ class UartDebugBFM:
         Args:
             rst: True = assert the reset. False = de-assert the reset
         """
-        uart_bfm.rxd._log.info(f"[UartHost] {'Assert' if rst else 'De-assert'} the reset")
+        if uart_bfm.info:
+            uart_bfm.rxd._log.info(f"[UartHost] {'Assert' if rst else 'De-assert'} the reset")
         cmd = 0xFE if rst else 0xFF
         await uart_bfm.send(cmd)
@@ -30,6 +30,7 @@ class WbDeviceBFM:
         self.DW = DW
         self.clk = dut.clk
         self.ram = {}
+        self.log = []   # requests processed by serve(): (we, addr, data)
         if default:
             self.connect_default()
             self.init()
@@ -146,3 +147,45 @@ class WbDeviceBFM:
         self.wb_ack_o.value = 0
         self.wb_dat_o.value = 0
         return data
+
+    async def serve(self, stall=0):
+        """
+        Process any read/write request forever. The requests are recorded in self.log
+        Parameter:
+            - stall (int): stall cycle. 0: no stall. > 0: stall `stall` cycle. < 0: random cycle within [0, -stall]
+        """
+        while True:
+            # wait for the assertion of wb_stb_i
+            await ReadWrite()
+            if self.wb_stb_i.value == 0:
+                await RisingEdge(self.wb_stb_i)
+                await ReadWrite()
+
+            # stall accordingly
+            cycle = random.randint(0, -stall) if stall < 0 else stall
+            if cycle != 0:
+                self.wb_stall_o.value = 1
+                for _ in range(cycle):
+                    await RisingEdge(self.clk)
+                    await ReadWrite()
+                self.wb_stall_o.value = 0
+
+            addr = self.wb_adr_i.value.integer
+            we = self.wb_we_i.value.integer
+            if we:
+                data = self.wb_dat_i.value.integer
+                self.ram[addr] = data
+            else:
+                data = self.ram.get(addr, 0)
+            self.log.append((we, addr, data))
+
+            # send ack (and read data)
+            await RisingEdge(self.clk)
+            await ReadWrite()
+            self.wb_ack_o.value = 1
+            if not we:
+                self.wb_dat_o.value = data
+            await RisingEdge(self.clk)
+            await ReadWrite()
+            self.wb_ack_o.value = 0
+            self.wb_dat_o.value = 0
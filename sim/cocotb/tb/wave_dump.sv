@@ -0,0 +1,30 @@
+// -------------------------------------------------------------------
+// Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+// -------------------------------------------------------------------
+//
+// Project: Uart Controller
+// Author: Heqing Huang
+// Date Created: 10/19/2026
+//
+// -------------------------------------------------------------------
+// wave_dump: waveform dump controlled by the testbench
+// - Extra top level module added by waves.mk
+// - Dumping is off until the testbench sets dump_en (see WaveWindow in Env.py)
+// -------------------------------------------------------------------
+
+module wave_dump;
+
+    reg dump_en = 1'b0;
+
+    initial begin
+        $dumpfile(`WAVE_FILE);
+        $dumpvars(0, `WAVE_TOP);
+        $dumpoff;
+    end
+
+    always @(dump_en) begin
+        if (dump_en) $dumpon;
+        else         $dumpoff;
+    end
+
+endmodule
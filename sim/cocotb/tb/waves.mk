@@ -0,0 +1,17 @@
+# waves.mk
+# Trigger windowed waveform capture. Include it before cocotb's Makefile.sim.
+#   WAVES_WINDOW = 1 adds the wave_dump module. Dumping starts off and is controlled
+#   from the test with WaveWindow (Env.py). Only supported with icarus.
+#   WAVES = 1 dumps the whole simulation and takes precedence.
+
+WAVES_WINDOW ?= 0
+
+ifeq ($(WAVES_WINDOW),1)
+ifneq ($(WAVES),1)
+ifeq ($(SIM),icarus)
+VERILOG_SOURCES += $(REPO)/sim/cocotb/tb/wave_dump.sv
+COMPILE_ARGS += -s wave_dump -DWAVE_TOP=$(TOPLEVEL) -DWAVE_FILE=\"$(SIM_BUILD)/$(TOPLEVEL).fst\"
+PLUSARGS += -fst
+endif
+endif
+endif
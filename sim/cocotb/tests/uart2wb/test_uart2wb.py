@@ -32,12 +32,15 @@ async def test_write(dut, baud=115200, period=20, stall=0):
     uart = UartBFM(baud)
     uart.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
     await init(dut, period)
-    addr = random.randint(0, 65535)
-    data = random.randint(0, 65535)
-    wb_write = cocotb.start_soon(wb.single_write(stall))
-    await UartDebugBFM.write_cmd(uart, addr, data)
-    wb_data = await wb_write
-    assert(data == wb_data)
+    # dump a window around a failure with WAVES_WINDOW=1
+    waves = WaveWindow(dut)
+    with waves.guard():
+        addr = random.randint(0, 65535)
+        data = random.randint(0, 65535)
+        wb_write = cocotb.start_soon(wb.single_write(stall))
+        await UartDebugBFM.write_cmd(uart, addr, data)
+        wb_data = await wb_write
+        assert(data == wb_data)
 
 wf = TestFactory(test_write)
 wf.add_option("stall", [0, 1, 2])
@@ -54,14 +57,17 @@ async def test_read(dut, baud=115200, period=20, stall=0):
     await init(dut, period)
     addr = random.randint(0, 65535)
     data = random.randint(0, 65535)
-    # write
-    wb_write = cocotb.start_soon(wb.single_write(stall))
-    await UartDebugBFM.write_cmd(uart, addr, data)
-    await wb_write
-    # read
-    wb_read  = cocotb.start_soon(wb.single_read(stall))
-    uart_data = await UartDebugBFM.read_cmd(uart, addr)
-    assert(data == uart_data)
+    # dump a window around a failure with WAVES_WINDOW=1
+    waves = WaveWindow(dut)
+    with waves.guard():
+        # write
+        wb_write = cocotb.start_soon(wb.single_write(stall))
+        await UartDebugBFM.write_cmd(uart, addr, data)
+        await wb_write
+        # read
+        wb_read  = cocotb.start_soon(wb.single_read(stall))
+        uart_data = await UartDebugBFM.read_cmd(uart, addr)
+        assert(data == uart_data)
 
 rf = TestFactory(test_read)
 rf.add_option("stall", [0, 1, 2])
@@ -0,0 +1,100 @@
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# Compressed image load through fpga_uart2wb_ram
+# Runs in its own build at a fast baud rate: make program
+# -------------------------------------------------------------------
+
+import sys
+sys.path.append('../../tb')
+sys.path.append('../../../../tools/UartDebug')
+
+import os
+import random
+import cocotb
+from cocotb.regression import TestFactory
+from cocotb.utils import get_sim_time
+
+from Env import *
+from UartBFM import *
+from UartDebugBFM import *
+from UartDebug import compress_image
+
+ADDR_BYTE = 1
+DATA_BYTE = 2
+BAUD_RATE = int(os.environ.get('BAUD_RATE', 115200))
+PERIOD    = 1000 / int(os.environ.get('CLK_FREQ', 100))
+
+def make_image(kind, num):
+    """
+    Representative RAM images of num words
+    - code:  program text, no repeated words
+    - bss:   program text followed by the zero initialized data
+    - table: erased (0xFFFF) memory, a step lookup table and a zero padded buffer
+    """
+    rnd = random.Random(kind)
+    code = [rnd.randint(0, 65535) for _ in range(num)]
+    if kind == 'code':
+        return code
+    if kind == 'bss':
+        return code[:num//4] + [0] * (num - num//4)
+    steps = [rnd.randint(0, 65535) for _ in range(num//32)]
+    table = [v for v in steps for _ in range(8)]
+    image = code[:num//8] + [0xFFFF] * (num//4) + table + [0] * num
+    return image[:num]
+
+async def load_image(dut, uart, image, compress):
+    """
+    Load the image from address 0. Return the load time in ns
+    """
+    start = get_sim_time('ns')
+    if compress:
+        await UartDebugBFM.zwrite_cmd(uart, 0, compress_image(image, DATA_BYTE), ADDR_BYTE)
+    else:
+        for i, data in enumerate(image):
+            await UartDebugBFM.write_cmd(uart, i * DATA_BYTE, data, ADDR_BYTE, DATA_BYTE)
+    # wait for the last write to complete
+    for _ in range(8):
+        await RisingEdge(dut.clk)
+    return get_sim_time('ns') - start
+
+async def test_program(dut, kind='code'):
+    """
+    Load an image with the single writes and with the compressed write.
+    Report the compression ratio and the effective load speed.
+    """
+    # fill the whole RAM (the address is a byte address)
+    num = min((1 << (8*ADDR_BYTE)) // DATA_BYTE, 1024)
+    uart = UartBFM(BAUD_RATE, info=False)
+    uart.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
+    dut.uart_rxd.value = 1
+    cocotb.start_soon(Clock(dut.clk, PERIOD, units = 'ns').start()) # clock
+    await generate_reset(dut)
+
+    image = make_image(kind, num)
+    # dump a window around a failure with WAVES_WINDOW=1
+    waves = WaveWindow(dut)
+    with waves.guard():
+        # load the inverted image first so the compressed write has to overwrite every word
+        raw_time = await load_image(dut, uart, [~data & 0xFFFF for data in image], False)
+        zip_time = await load_image(dut, uart, image, True)
+        for i, data in enumerate(image):
+            rdata = await UartDebugBFM.read_cmd(uart, i * DATA_BYTE, ADDR_BYTE, DATA_BYTE)
+            assert rdata == data, f"{kind}: address {hex(i * DATA_BYTE)} got {hex(rdata)}, expected {hex(data)}"
+
+    raw_size = num * (1 + ADDR_BYTE + DATA_BYTE)
+    zip_size = 1 + ADDR_BYTE + len(compress_image(image, DATA_BYTE))
+    size = num * DATA_BYTE
+    dut._log.info(f"[Program] {kind:<6}: {num} words. Single write {raw_size} bytes, {size * 1e9 / raw_time:.0f} B/s. "
+                  f"Compressed write {zip_size} bytes, {size * 1e9 / zip_time:.0f} B/s. "
+                  f"Compression ratio {raw_size / zip_size:.2f}x, speedup {raw_time / zip_time:.2f}x")
+
+pf = TestFactory(test_program)
+pf.add_option("kind", ['code', 'bss', 'table'])
+pf.generate_tests()
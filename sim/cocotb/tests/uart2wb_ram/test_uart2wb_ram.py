@@ -34,11 +34,14 @@ async def test_read(dut, baud=115200, stall=0):
     await generate_reset(dut)
     addr = random.randint(0, 255)
     data = random.randint(0, 65535)
-    # write
-    await UartDebugBFM.write_cmd(uart, addr, data, abyte=1)
-    # read
-    uart_data = await UartDebugBFM.read_cmd(uart, addr, abyte=1)
-    assert(data == uart_data)
+    # dump a window around a failure with WAVES_WINDOW=1
+    waves = WaveWindow(dut)
+    with waves.guard():
+        # write
+        await UartDebugBFM.write_cmd(uart, addr, data, abyte=1)
+        # read
+        uart_data = await UartDebugBFM.read_cmd(uart, addr, abyte=1)
+        assert(data == uart_data)
 
 rf = TestFactory(test_read)
 rf.add_option("stall", [0, 1, 2])
@@ -0,0 +1,299 @@
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# Constrained random stress test for uart2wb
+# Thousands of mixed commands are checked against Uart2wbModel
+# -------------------------------------------------------------------
+
+import sys
+sys.path.append('../../tb')
+sys.path.append('../../../../tools/UartDebug')
+
+import os
+import random
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+from cocotb.utils import get_sim_time
+
+from Env import *
+from UartBFM import *
+from UartDebugBFM import *
+from WbDeviceBFM import *
+from Uart2wbModel import *
+from UartDebug import compress_image
+
+CMD_NAME = {CMD_READ: 'read', CMD_WRITE: 'write', CMD_ZWRITE: 'zwrite', CMD_RST_A: 'rst_a', CMD_RST_D: 'rst_d'}
+
+def max_repeat(clk_freq, baud, stall):
+    """
+    Longest repeat run of the compressed write uart2wb completes within 2 UART byte time
+    (the next byte is kept in the holding register). Each word takes 2 + stall cycles.
+    """
+    byte_cycles = 10 * clk_freq * 1000000 / baud
+    return min(0x7F, int((2 * byte_cycles - 20) // (2 + stall)))
+
+class Uart2wbTraffic:
+    """
+    Constrained random command generator
+    - read only from the address already written
+    - back-to-back reads, read after write, reset command in the middle of the traffic
+    - corner value (zero and max) for address and data
+    - compressed write with literal and repeat runs, 0x80 end header and address wrap
+    """
+
+    def __init__(self, abyte, dbyte, max_repeat=0x7F):
+        self.dbyte = dbyte
+        self.amax = (1 << (8*abyte)) - 1
+        self.dmax = (1 << (8*dbyte)) - 1
+        self.max_repeat = max_repeat
+        self.written = []
+        self.written_set = set()
+        self.last_addr = 0
+
+    def _write(self, addr):
+        if addr not in self.written_set:
+            self.written.append(addr)
+            self.written_set.add(addr)
+
+    def _addr(self):
+        sel = random.randint(0, 9)
+        if sel == 0: return 0
+        if sel == 1: return self.amax
+        if sel == 2 and self.written: return random.choice(self.written)
+        return random.randint(0, self.amax)
+
+    def _data(self):
+        sel = random.randint(0, 9)
+        if sel == 0: return 0
+        if sel == 1: return self.dmax
+        return random.randint(0, self.dmax)
+
+    def next(self):
+        """
+        Return the next command: (cmd, addr, data)
+        """
+        kind = random.choices(['write', 'read', 'read_same', 'rst', 'zwrite'], weights=[36, 35, 15, 10, 4])[0]
+        if kind == 'rst':
+            return (random.choice([CMD_RST_A, CMD_RST_D]), 0, 0)
+        if kind == 'zwrite':
+            return self._zwrite()
+        if kind == 'write' or not self.written:
+            addr = self._addr()
+            self._write(addr)
+            self.last_addr = addr
+            return (CMD_WRITE, addr, self._data())
+        # read the last accessed address again (back-to-back read / read after write)
+        if kind == 'read_same':
+            return (CMD_READ, self.last_addr, 0)
+        self.last_addr = random.choice(self.written)
+        return (CMD_READ, self.last_addr, 0)
+
+    def _zwrite(self):
+        """
+        Compressed write of an image made of literal and repeat segments
+        """
+        image = []
+        for _ in range(random.randint(1, 4)):
+            if random.randint(0, 1):
+                image += [self._data() for _ in range(random.randint(1, 8))]
+            else:
+                # longer than max_repeat is split into several repeat runs
+                num = random.choice([2, self.max_repeat, self.max_repeat + 1, random.randint(2, 2 * self.max_repeat)])
+                image += [self._data()] * num
+        # start close to the max address so the address wraps around
+        if random.randint(0, 3) == 0:
+            addr = (self.amax + 1 - self.dbyte * random.randint(1, 8)) & self.amax
+        else:
+            addr = self._addr()
+        runs = bytearray(compress_image(image, self.dbyte, self.max_repeat))
+        if random.randint(0, 1):
+            runs[-1] = 0x80     # the run length is 0 with the repeat bit set, also ends the command
+        for i in range(len(image)):
+            self._write((addr + i * self.dbyte) & self.amax)
+        self.last_addr = addr
+        return (CMD_ZWRITE, addr, bytes(runs))
+
+class Uart2wbCoverage:
+    """
+    Functional coverage of the random traffic
+    """
+
+    def __init__(self, abyte, dbyte, max_repeat=0x7F):
+        self.amax = (1 << (8*abyte)) - 1
+        self.dmax = (1 << (8*dbyte)) - 1
+        self.max_repeat = max_repeat
+        names = list(CMD_NAME.values())
+        self.bins = {
+            'cmd':        {name: 0 for name in names},
+            'transition': {(a, b): 0 for a in names for b in names},
+            'addr':       {'zero': 0, 'max': 0, 'other': 0},
+            'data':       {'zero': 0, 'max': 0, 'other': 0},
+            'zwrite':     {'literal': 0, 'repeat': 0, 'repeat_max': 0, 'end_0x00': 0, 'end_0x80': 0, 'wrap': 0},
+        }
+        self.prev = None
+        self.dbyte = dbyte
+
+    def _corner(self, value, vmax):
+        return 'zero' if value == 0 else 'max' if value == vmax else 'other'
+
+    def sample(self, cmd, addr, data):
+        name = CMD_NAME[cmd]
+        self.bins['cmd'][name] += 1
+        if self.prev:
+            self.bins['transition'][(self.prev, name)] += 1
+        self.prev = name
+        if cmd in (CMD_READ, CMD_WRITE):
+            self.bins['addr'][self._corner(addr, self.amax)] += 1
+        if cmd == CMD_WRITE:
+            self.bins['data'][self._corner(data, self.dmax)] += 1
+        if cmd == CMD_ZWRITE:
+            self._sample_runs(addr, data)
+
+    def _sample_runs(self, addr, runs):
+        bins = self.bins['zwrite']
+        pos = 0
+        words = 0
+        while runs[pos] & 0x7F:
+            num = runs[pos] & 0x7F
+            if runs[pos] & 0x80:
+                bins['repeat'] += 1
+                if num == self.max_repeat:
+                    bins['repeat_max'] += 1
+                pos += 1 + self.dbyte
+            else:
+                bins['literal'] += 1
+                pos += 1 + num * self.dbyte
+            words += num
+        bins['end_0x80' if runs[pos] == 0x80 else 'end_0x00'] += 1
+        if addr + words * self.dbyte > self.amax + 1:
+            bins['wrap'] += 1
+
+    def report(self, log):
+        total = 0
+        hit = 0
+        for group, bins in self.bins.items():
+            nhit = sum(1 for n in bins.values() if n)
+            log.info(f"[Coverage] {group:<10}: {nhit}/{len(bins)} bins hit")
+            missed = [str(b) for b, n in bins.items() if n == 0]
+            if missed:
+                log.info(f"[Coverage] {group:<10}: missed {', '.join(missed)}")
+            total += len(bins)
+            hit += nhit
+        log.info(f"[Coverage] total     : {100 * hit / total:.1f}%")
+        return hit / total
+
+@cocotb.test()
+async def test_stress(dut, stall=-3):
+    """
+    Run STRESS_NUM constrained random commands and check them against the reference model
+    """
+    abyte = int(os.environ.get('ADDR_BYTE', 2))
+    dbyte = int(os.environ.get('DATA_BYTE', 2))
+    baud  = int(os.environ.get('BAUD_RATE', 1538461))
+    period = 1000 / int(os.environ.get('CLK_FREQ', 100))
+    num = int(os.environ.get('STRESS_NUM', 2000))
+    seed = int(os.environ.get('STRESS_SEED', random.randrange(1 << 32)))
+    random.seed(seed)
+    dut._log.info(f"[Stress] {num} commands. seed = {seed}. ADDR_BYTE = {abyte}, DATA_BYTE = {dbyte}")
+
+    wb = WbDeviceBFM(dut, 8*abyte, 8*dbyte, default=True)
+    uart = UartBFM(baud, info=False)
+    uart.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
+    dut.enable.value = 1
+    dut.uart_rxd.value = 1
+    cocotb.start_soon(Clock(dut.clk, period, units = 'ns').start()) # clock
+    await generate_reset(dut)
+    cocotb.start_soon(wb.serve(stall))
+
+    # only dump the waveform around the reset commands and the failure
+    waves = WaveWindow(dut, pre=20000, post=20000)
+    cocotb.start_soon(waves.watch(dut.rst_n_out, 0, 'reset command'))
+
+    model = Uart2wbModel(abyte, dbyte)
+    repeat = max_repeat(1000 / period, baud, abs(stall))
+    traffic = Uart2wbTraffic(abyte, dbyte, repeat)
+    coverage = Uart2wbCoverage(abyte, dbyte, repeat)
+    nbyte = 0
+    start = get_sim_time('ns')
+    with waves.guard():
+        for i in range(num):
+            cmd, addr, data = traffic.next()
+            expected = model.execute(cmd, addr, data)
+            nbyte += len(model.encode(cmd, addr, data)) + (dbyte if cmd == CMD_READ else 0)
+            if cmd == CMD_WRITE:
+                await UartDebugBFM.write_cmd(uart, addr, data, abyte, dbyte)
+            elif cmd == CMD_ZWRITE:
+                await UartDebugBFM.zwrite_cmd(uart, addr, data, abyte)
+            elif cmd == CMD_READ:
+                rdata = await UartDebugBFM.read_cmd(uart, addr, abyte, dbyte)
+                assert rdata == expected, f"Command {i}: read {hex(addr)} got {hex(rdata)}, expected {hex(expected)}"
+                # all the previous requests have completed on the bus when the read data is back
+                assert wb.log == model.bus, f"Command {i}: wishbone requests mismatch the model"
+            else:
+                await UartDebugBFM.rst_cmd(uart, cmd == CMD_RST_A)
+                await RisingEdge(dut.clk)
+                await RisingEdge(dut.clk)
+                assert dut.rst_n_out.value == model.rst_n_out, f"Command {i}: rst_n_out mismatch"
+            coverage.sample(cmd, addr, data)
+        elapsed = get_sim_time('ns') - start
+
+        # wait for the last write to complete on the bus
+        for _ in range(16):
+            await RisingEdge(dut.clk)
+        assert wb.log == model.bus, "Wishbone requests mismatch the model"
+
+    # sustained throughput: time on the wire vs total time
+    wire = nbyte * 10 * uart.interval
+    dut._log.info(f"[Stress] {num} commands, {nbyte} bytes in {elapsed / 1000:.1f} us. "
+                  f"{num * 1e9 / elapsed:.0f} commands/s, link utilization {100 * wire / elapsed:.1f}%")
+    coverage.report(dut._log)
+
+@cocotb.test()
+async def test_zwrite_hold(dut, stall=5):
+    """
+    Compressed write with long repeat runs and a stalling slave. Each repeat run takes longer
+    than a UART byte time, so the following run header is kept in the holding register.
+    """
+    abyte = int(os.environ.get('ADDR_BYTE', 2))
+    dbyte = int(os.environ.get('DATA_BYTE', 2))
+    baud  = int(os.environ.get('BAUD_RATE', 1538461))
+    period = 1000 / int(os.environ.get('CLK_FREQ', 100))
+    repeat = max_repeat(1000 / period, baud, stall)
+    byte_cycles = 10 * 1000 / period * 1000000 / baud
+    dut._log.info(f"[Hold] repeat run of {repeat} words: {repeat * (2 + stall)} cycles, byte time {byte_cycles:.0f} cycles")
+
+    wb = WbDeviceBFM(dut, 8*abyte, 8*dbyte, default=True)
+    uart = UartBFM(baud, info=False)
+    uart.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
+    dut.enable.value = 1
+    dut.uart_rxd.value = 1
+    cocotb.start_soon(Clock(dut.clk, period, units = 'ns').start()) # clock
+    await generate_reset(dut)
+    cocotb.start_soon(wb.serve(stall))
+
+    model = Uart2wbModel(abyte, dbyte)
+    image = []
+    for i in range(4):
+        image += [random.randint(0, (1 << (8*dbyte)) - 1)] * repeat
+        image += [random.randint(0, (1 << (8*dbyte)) - 1) for _ in range(i)]
+    # wrap around the max address in the middle of a run
+    addr = ((1 << (8*abyte)) - dbyte * repeat) & ((1 << (8*abyte)) - 1)
+    runs = compress_image(image, dbyte, repeat)
+    # dump a window around a failure with WAVES_WINDOW=1
+    waves = WaveWindow(dut, pre=20000, post=20000)
+    with waves.guard():
+        model.execute(CMD_ZWRITE, addr, runs)
+        await UartDebugBFM.zwrite_cmd(uart, addr, runs, abyte)
+        # read back the word after the image: the command only completes once the end header is taken
+        last = (addr + len(image) * dbyte) & ((1 << (8*abyte)) - 1)
+        expected = model.execute(CMD_READ, last)
+        rdata = await UartDebugBFM.read_cmd(uart, last, abyte, dbyte)
+        assert rdata == expected, f"read {hex(last)} got {hex(rdata)}, expected {hex(expected)}"
+        assert wb.log == model.bus, "Wishbone requests mismatch the model"
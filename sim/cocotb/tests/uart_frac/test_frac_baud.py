@@ -0,0 +1,56 @@
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# Baud rate sweep for the fractional baud generator
+# The design clock is offset by +/- ppm while cfg_div is calculated
+# from the nominal clock, the UartBFM always runs at the nominal baud.
+# -------------------------------------------------------------------
+
+import sys
+sys.path.append('../../tb')
+
+import os
+import random
+import cocotb
+from cocotb.regression import TestFactory
+
+from Env import *
+from AXISBFM import *
+from UartBFM import *
+
+async def sweep(dut, baud=115200, ppm=0, period=10, num=8):
+    """
+    Send and receive num random bytes at the given baud rate and clock offset
+    """
+    frac = int(os.environ.get('FRAC', 8))
+    bfm = UartBFM(baud, info=False)
+    bfm.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
+    dut.uart_rxd.value = 1
+    await init(dut, period, baud, frac, ppm)
+    dut._log.info(f"Clock {1000 / period:.0f} MHz {ppm:+} ppm, baud {baud}, cfg_div {dut.cfg_div.value.integer}")
+    # receive path
+    for _ in range(num):
+        value = random.randint(0, 255)
+        rcv = cocotb.start_soon(axis_receive(dut, info=False))
+        await bfm.send(value)
+        data = await rcv
+        assert value == data, f"RX error at baud {baud} {ppm:+} ppm: sent {hex(value)}, got {hex(data)}"
+    # transmit path
+    for _ in range(num):
+        value = random.randint(0, 255)
+        rcv = cocotb.start_soon(bfm.receive())
+        await axis_send(dut, value, info=False)
+        data = await rcv
+        assert value == data, f"TX error at baud {baud} {ppm:+} ppm: sent {hex(value)}, got {hex(data)}"
+
+tf = TestFactory(sweep)
+tf.add_option("baud", [115200, 1000000, 2000000, 3000000])
+tf.add_option("ppm", [-10000, -100, 0, 100, 10000])
+tf.add_option("period", [10, 20])   # 100 MHz (Arty) and 50 MHz (DE2)
+tf.generate_tests()
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# Baud rate tolerance characterization sweep
+# Run test_tolerance for every (ppm, jitter, stop bit length) point in
+# parallel simulations, then print the pass/fail surface and the max
+# sustained throughput of each configuration.
+#
+# Usage: ./sweep.py [-j jobs] [--baud 115200] [--ppm -40000 0 40000] ...
+# -------------------------------------------------------------------
+
+import os
+import json
+import argparse
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Baud rate tolerance characterization sweep')
+    parser.add_argument('--baud', type=int, default=115200, help='Nominal baud rate')
+    parser.add_argument('--period', type=float, default=10, help='Clock period in ns')
+    parser.add_argument('--frac', type=int, default=0, help='FRAC parameter of the design')
+    parser.add_argument('--ppm', type=float, nargs='+',
+                        default=[-60000, -50000, -40000, -30000, -20000, -10000, 0,
+                                 10000, 20000, 30000, 40000, 50000, 60000],
+                        help='BFM baud rate offset in ppm')
+    parser.add_argument('--jitter', type=float, nargs='+', default=[0],
+                        help='BFM bit edge jitter in percent of the bit time')
+    parser.add_argument('--stop', type=float, nargs='+', default=[1.0, 2.0],
+                        help='BFM stop bit length in bit time')
+    parser.add_argument('--num', type=int, default=32, help='Number of bytes in each direction')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='Number of parallel simulations')
+    parser.add_argument('-o', '--output', default='tolerance.json', help='Result file')
+    return parser.parse_args()
+
+def run_point(args, job, ppm, jitter, stop):
+    """
+    Run one point of the sweep. Return the result
+    """
+    out = os.path.abspath(f"results/point_{job}.json")
+    env = dict(os.environ)
+    env.update({
+        'TOL_BAUD': str(args.baud),
+        'TOL_PERIOD': str(args.period),
+        'TOL_PPM': str(ppm),
+        # jitter is given in percent of the bit time, the BFM takes ns
+        'TOL_JITTER': str(jitter / 100 * 1e9 / args.baud),
+        'TOL_STOP': str(stop),
+        'TOL_NUM': str(args.num),
+        'TOL_OUT': out,
+        'COCOTB_RESULTS_FILE': os.path.abspath(f"results/point_{job}.xml"),
+    })
+    if os.path.exists(out):
+        os.unlink(out)
+    subprocess.run(['make', f"FRAC={args.frac}"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    if not os.path.exists(out):
+        return {'ppm': ppm, 'jitter': jitter, 'stop': stop, 'rx_pass': False, 'tx_pass': False,
+                'throughput': 0, 'error': 'simulation failed'}
+    with open(out, 'r') as FH:
+        result = json.load(FH)
+    # report the jitter in percent as it is swept
+    result['jitter'] = jitter
+    return result
+
+def main():
+    args = parse_args()
+    os.makedirs('results', exist_ok=True)
+    points = list(itertools.product(args.ppm, args.jitter, args.stop))
+    print(f"Running {len(points)} points with {args.jobs} parallel simulations")
+    # the first point also builds the simulation, the others share the build and run in parallel
+    results = [run_point(args, 0, *points[0])]
+    with ThreadPoolExecutor(args.jobs) as pool:
+        jobs = [pool.submit(run_point, args, job, *point) for job, point in enumerate(points) if job > 0]
+        results += [job.result() for job in jobs]
+
+    # pass/fail surface: one row per ppm, one column per (jitter, stop)
+    columns = list(itertools.product(args.jitter, args.stop))
+    table = {(r['ppm'], r['jitter'], r['stop']): r for r in results}
+    print(f"\nPass/fail surface at {args.baud} baud (RX/TX, P = pass, F = fail)")
+    print(f"{'ppm':>8} " + ' '.join(f"{f'j{j:g}% s{s:g}':>12}" for j, s in columns))
+    for ppm in args.ppm:
+        cells = []
+        for jitter, stop in columns:
+            r = table[(ppm, jitter, stop)]
+            cells.append(f"{('P' if r['rx_pass'] else 'F') + '/' + ('P' if r['tx_pass'] else 'F'):>12}")
+        print(f"{ppm:>8g} " + ' '.join(cells))
+
+    print(f"\nMax sustained throughput (byte/s) of the error free configurations")
+    for jitter, stop in columns:
+        passed = [table[(ppm, jitter, stop)] for ppm in args.ppm if table[(ppm, jitter, stop)]['rx_pass']]
+        if passed:
+            best = max(passed, key=lambda r: r['throughput'])
+            print(f"  jitter {jitter:g}%, stop {stop:g}: {best['throughput']:.0f} B/s at {best['ppm']:+g} ppm. "
+                  f"RX tolerance {min(r['ppm'] for r in passed):+g} .. {max(r['ppm'] for r in passed):+g} ppm")
+        else:
+            print(f"  jitter {jitter:g}%, stop {stop:g}: no error free point")
+
+    with open(args.output, 'w') as FH:
+        json.dump(results, FH, indent=4)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    main()
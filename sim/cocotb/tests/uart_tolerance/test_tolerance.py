@@ -0,0 +1,99 @@
+# -------------------------------------------------------------------
+# Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+# -------------------------------------------------------------------
+#
+# Project: UART Controller
+# Author: Heqing Huang
+# Date Created: 10/19/2026
+#
+# -------------------------------------------------------------------
+# Baud rate tolerance characterization: one point of the sweep
+# The UartBFM runs with ppm skew, jitter and stop bit length given by
+# the TOL_xxx environment variables (set by sweep.py) and sends/receives
+# a back-to-back burst. The result is written to TOL_OUT in json.
+# -------------------------------------------------------------------
+
+import sys
+sys.path.append('../../tb')
+
+import os
+import json
+import random
+import cocotb
+from cocotb.triggers import RisingEdge, ReadWrite, Timer
+from cocotb.utils import get_sim_time
+
+from Env import *
+from AXISBFM import *
+from UartBFM import *
+
+async def monitor_rx(dut, data_list):
+    """
+    Collect all the bytes received by uart_rx
+    """
+    while True:
+        await RisingEdge(dut.rx_valid)
+        await ReadWrite()
+        data_list.append(dut.rx_data.value.integer)
+
+async def receive_all(bfm, data_list):
+    """
+    Collect all the bytes received by the UartBFM
+    """
+    while True:
+        await bfm.receive(data_list)
+
+@cocotb.test()
+async def test_tolerance(dut):
+    """
+    Send and receive a back-to-back burst with the BFM skewed by TOL_PPM
+    """
+    cfg = {
+        'baud':   int(os.environ.get('TOL_BAUD', 115200)),
+        'period': float(os.environ.get('TOL_PERIOD', 10)),
+        'frac':   int(os.environ.get('FRAC', 0)),
+        'ppm':    float(os.environ.get('TOL_PPM', 0)),
+        'jitter': float(os.environ.get('TOL_JITTER', 0)),
+        'stop':   float(os.environ.get('TOL_STOP', 1)),
+        'num':    int(os.environ.get('TOL_NUM', 32)),
+    }
+    bfm = UartBFM(cfg['baud'], info=False, ppm=cfg['ppm'], jitter=cfg['jitter'], stop_len=cfg['stop'], strict=False)
+    bfm.connect(dut.clk, dut.uart_txd, dut.uart_rxd)
+    dut.uart_rxd.value = 1
+    await init(dut, cfg['period'], cfg['baud'], cfg['frac'])
+    frame_ps = 10 * bfm.bit_ps
+
+    # receive path: BFM => uart_rx
+    values = [random.randint(0, 255) for _ in range(cfg['num'])]
+    received = []
+    monitor = cocotb.start_soon(monitor_rx(dut, received))
+    start = get_sim_time('ps')
+    for value in values:
+        await bfm.send(value)
+    elapsed = get_sim_time('ps') - start
+    await Timer(round(2 * frame_ps), units='ps')
+    monitor.kill()
+    rx_errors = sum(1 for a, b in zip(values, received) if a != b) + abs(len(values) - len(received))
+
+    # transmit path: uart_tx => BFM
+    values = [random.randint(0, 255) for _ in range(cfg['num'])]
+    received = []
+    receiver = cocotb.start_soon(receive_all(bfm, received))
+    for value in values:
+        await axis_send(dut, value, info=False)
+    await Timer(round(3 * frame_ps), units='ps')
+    receiver.kill()
+    tx_errors = sum(1 for a, b in zip(values, received) if a != b) + abs(len(values) - len(received)) + bfm.frame_errors
+
+    result = dict(cfg)
+    result['rx_errors'] = rx_errors
+    result['tx_errors'] = tx_errors
+    result['rx_pass'] = rx_errors == 0
+    result['tx_pass'] = tx_errors == 0
+    # sustained throughput of the error free back-to-back burst (byte/s)
+    result['throughput'] = cfg['num'] * 1e12 / elapsed if rx_errors == 0 else 0
+    dut._log.info(f"[Tolerance] {result}")
+    if 'TOL_OUT' in os.environ:
+        with open(os.environ['TOL_OUT'], 'w') as FH:
+            json.dump(result, FH)
+    assert rx_errors == 0 and tx_errors == 0, f"{rx_errors} RX errors, {tx_errors} TX errors"
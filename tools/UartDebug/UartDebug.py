@@ -17,8 +17,12 @@ NAME
     UartDebug.py - Interactive shell to communicate with target FPGA
 
 SYNOPSIS
-    UartDebug.py
-    UartDebug.py file [addr]
+    UartDebug.py [-c] [-z]
+    UartDebug.py [-c] [-z] file [addr]
+    UartDebug.py [-c] [-z] -s script
+    UartDebug.py [-c] -w addr [addr ...] [--interval sec] [--count n] [--ring n] [--log file.npy]
+    UartDebug.py -d
+    UartDebug.py file [addr] -f port [port ...] [--no-verify]
 
 DESCRIPTION
     This python script communicates with the target FPGA using UART debug
@@ -37,6 +41,57 @@ USAGE
     UartDebug.py file.hex [addr]
         Program the file to FPGA RAM starting at optional addr (default is 0).
 
+    UartDebug.py [-c] -s, --script script
+        Run the shell commands (read, write, program, exit) in the script
+        non-interactively. Use - to read the script from stdin. Text after #
+        is a comment. The whole script is checked before any command is sent
+        to the target. Writes and reads are packed into batched transfers and
+        the result of each command is printed as a JSON line, e.g.
+            {"line": 2, "cmd": "read", "addr": 16, "data": 4660}
+
+    UartDebug.py [-c] -w, --watch addr [addr ...]
+        Poll the addresses every --interval seconds (default 0, as fast as
+        the link allows) for --count samples (default 0, until Ctrl-C). The
+        latest values are printed every second. The samples (host timestamp
+        and the value of each address) are stored in a preallocated ring
+        buffer of --ring samples (at least 2, default 65536) and streamed to the --log
+        file, which can be loaded with numpy.load().
+
+    UartDebug.py -d, --daemon
+        Start the UartDebug daemon. The daemon holds the serial port open and
+        serves any number of local clients through a Unix socket. Writes from
+        all the clients are coalesced into batched UART transfers and the
+        clients are served in round-robin order.
+
+    UartDebug.py -c, --client [file.hex [addr]]
+        Same as above, but talk to a running daemon instead of opening the
+        serial port directly.
+
+    UartDebug.py file.hex [addr] -f, --fleet port [port ...] [-z] [--no-verify]
+        Program the same file to many boards in parallel. The ports can be
+        glob patterns (quote them), e.g. '/dev/ttyUSB*'. The image is parsed
+        once and each board is programmed and verified by its own worker
+        process. Prints the throughput of each board and the failed boards.
+        -z programs the boards with the compressed write command.
+        --no-verify skips the read back.
+
+    -z, --compress
+        Program the images (file, program command, script mode) with the
+        compressed write command: the image is run length encoded and
+        uart2wb expands it into sequential writes. The target must support
+        the compressed write command. Also used in fleet mode.
+
+    --stats <file>
+        Collect the link statistics: latency histogram of each command, number
+        of write/read calls, bytes sent/received, timeouts, time spent in the
+        write calls and waiting for the read data, and the achieved throughput
+        and link efficiency compared to the baud rate. The statistics are
+        exported to <file> (json) at exit.
+
+    --socket <path>
+        Unix socket used by the daemon and the clients. Overrides the
+        'socket' entry in the config file.
+
 SUPPORTED COMMANDS IN INTERACTIVE SHELL
     help
         Print help message.
@@ -55,6 +110,9 @@ SUPPORTED COMMANDS IN INTERACTIVE SHELL
         contents of <file>. The address of subsequent data is automatically
         calculated.
 
+    stats [reset]
+        Print (or reset) the link statistics. Requires --stats.
+
 CONFIG FILE
     The script uses a configuration file to define FPGA target parameters:
 
@@ -70,63 +128,297 @@ CONFIG FILE
     data_byte
         Number of data byte (e.g., 2).
 
+    socket
+        Unix socket path of the daemon (optional, default /tmp/UartDebug.sock).
+
+    max_repeat
+        Max words of a compressed write repeat run (optional, default 127).
+
+DAEMON PROTOCOL
+    Clients send the raw uart2wb commands over the socket:
+        read    0x01 - Address
+        write   0x02 - Address - Data
+        zwrite  0x03 - Address - Run ... - 0x00
+        reset   0xFE (assert) / 0xFF (de-assert)
+    Each run of the compressed write starts with a header byte: bit 6:0 is
+    the number of words (1 - 127), bit 7 = 1 repeats the following word and
+    bit 7 = 0 is followed by the literal words.
+    Address and data are little endian with addr_byte/data_byte bytes. The
+    daemon replies data_byte bytes for each read, in request order. In
+    addition, the daemon-only command 0x80 (info) replies 2 bytes:
+    addr_byte and data_byte.
+
 AUTHOR
     Heqing Huang
 
 ------------------------------------------------------------------------------------------------------------------------
 """
 
-import serial
 import json
 import argparse
 import sys
+import os
+import socket
+import selectors
+import signal
+import struct
+import atexit
+import glob
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import deque
+
+# uart2wb commands
+CMD_READ  = 0x01
+CMD_WRITE = 0x02
+CMD_ZWRITE = 0x03
+CMD_RST_A = 0xFE
+CMD_RST_D = 0xFF
+# daemon only command, never sent to the target
+CMD_INFO  = 0x80
 
-class UartHost:
+CMD_NAME = {CMD_READ: 'read', CMD_WRITE: 'write', CMD_ZWRITE: 'zwrite', CMD_RST_A: 'rst', CMD_RST_D: 'rst'}
+
+# compressed write run header: bit 7 = repeat run, bit 6:0 = number of words. 0 words ends the command
+RUN_REPEAT = 0x80
+RUN_MAX = 0x7F
+
+DEFAULT_SOCKET = '/tmp/UartDebug.sock'
+
+class UartStats:
     """
-    Class to interact with the Uart module in target FPGA
+    Counters and latency histograms of the UART link. Enabled with --stats.
     """
 
-    def __init__(self, config_file='config.json'):
-        self.config_file=config_file
-        self._get_config()
-        self._open_serial()
+    HIST_BINS = 24      # bin i counts the latency in [2^i, 2^(i+1)) us. bin 0 also counts < 1 us
+
+    def __init__(self, baud_rate=None):
+        self.baud_rate = baud_rate
+        self.reset()
 
-    def _get_config(self):
+    def reset(self):
+        self.start = time.perf_counter()
+        self.cmds = {}          # command name => latency statistic
+        self.write_calls = 0
+        self.read_calls = 0
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.timeouts = 0
+        self.write_time = 0.0   # time spent in the write calls
+        self.read_time = 0.0    # time blocked waiting for the read data
+
+    def record(self, cmd, latency):
         """
-        Get the config from config file
+        Record the latency (in second) of a command
         """
-        with open(self.config_file, 'r') as file:
-            config = json.load(file)
-            self.com_port  = config['com_port']
-            self.baud_rate = config['baud_rate']
-            self.addr_byte = config['addr_byte']
-            self.data_byte = config['data_byte']
+        entry = self.cmds.get(cmd)
+        if entry is None:
+            entry = {'count': 0, 'total': 0.0, 'min': latency, 'max': latency, 'hist': [0] * self.HIST_BINS}
+            self.cmds[cmd] = entry
+        entry['count'] += 1
+        entry['total'] += latency
+        entry['min'] = min(entry['min'], latency)
+        entry['max'] = max(entry['max'], latency)
+        entry['hist'][min(max(int(latency * 1e6).bit_length() - 1, 0), self.HIST_BINS - 1)] += 1
 
-    def _open_serial(self):
+    def record_write(self, size, elapsed):
+        self.write_calls += 1
+        self.tx_bytes += size
+        self.write_time += elapsed
+
+    def record_read(self, size, elapsed, expected):
+        self.read_calls += 1
+        self.rx_bytes += size
+        self.read_time += elapsed
+        if size < expected:
+            self.timeouts += 1
+
+    def report(self):
         """
-        Open the serial port
+        Return all the statistics as a dict
+        """
+        link_time = self.write_time + self.read_time
+        total_bytes = self.tx_bytes + self.rx_bytes
+        if self.baud_rate:
+            # 10 bits (start + 8 data + stop) per byte
+            wire_time = total_bytes * 10 / self.baud_rate
+        report = {
+            'elapsed': time.perf_counter() - self.start,
+            'write_calls': self.write_calls,
+            'read_calls': self.read_calls,
+            'tx_bytes': self.tx_bytes,
+            'rx_bytes': self.rx_bytes,
+            'timeouts': self.timeouts,
+            'write_time': self.write_time,
+            'read_time': self.read_time,
+            'link_time': link_time,
+            'throughput': total_bytes / link_time if link_time else 0.0,
+            'commands': {},
+        }
+        if self.baud_rate:
+            report['baud_rate'] = self.baud_rate
+            report['wire_time'] = wire_time
+            report['theoretical_throughput'] = self.baud_rate / 10
+            report['efficiency'] = wire_time / link_time if link_time else 0.0
+            # the link can not be faster than the wire. A shorter link time means the data was
+            # still buffered (e.g. by a pty) when the timer stopped, so the link time is a lower bound
+            report['buffered'] = link_time < wire_time
+        for cmd, entry in self.cmds.items():
+            report['commands'][cmd] = {
+                'count': entry['count'],
+                'avg': entry['total'] / entry['count'],
+                'min': entry['min'],
+                'max': entry['max'],
+                'hist_us': {f"{1 << i}": n for i, n in enumerate(entry['hist']) if n},
+            }
+        return report
+
+    def summary(self):
+        """
+        Return the statistics as a printable string
+        """
+        r = self.report()
+        lines = [f"Link statistics over {r['elapsed']:.3f}s",
+                 f"  {'command':<10}{'count':>10}{'avg(us)':>12}{'min(us)':>12}{'max(us)':>12}"]
+        for cmd, c in r['commands'].items():
+            lines.append(f"  {cmd:<10}{c['count']:>10}{c['avg']*1e6:>12.1f}{c['min']*1e6:>12.1f}{c['max']*1e6:>12.1f}")
+            lines.append(f"  {'':<10}latency histogram (us >= bin): " +
+                         ' '.join(f"{k}:{n}" for k, n in c['hist_us'].items()))
+        lines.append(f"  calls:      {r['write_calls']} write, {r['read_calls']} read, {r['timeouts']} timeouts")
+        lines.append(f"  bytes:      {r['tx_bytes']} sent, {r['rx_bytes']} received")
+        lines.append(f"  link time:  {r['write_time']:.3f}s in write, {r['read_time']:.3f}s waiting for read data")
+        if 'wire_time' in r:
+            lines.append(f"  wire time:  {r['wire_time']:.3f}s at {r['baud_rate']} baud. "
+                         f"Link efficiency {100 * r['efficiency']:.1f}%")
+            lines.append(f"  throughput: {r['throughput']:.0f} B/s achieved, {r['theoretical_throughput']:.0f} B/s theoretical")
+            if r['buffered']:
+                lines.append("  note:       link time is shorter than the wire time, the data was still buffered "
+                             "when the writes returned")
+        else:
+            lines.append(f"  throughput: {r['throughput']:.0f} B/s achieved")
+        return '\n'.join(lines)
+
+    def dump(self, file):
+        """
+        Export the statistics to a json file
+        """
+        with open(file, 'w') as FH:
+            json.dump(self.report(), FH, indent=4)
+
+class UartLink:
+    """
+    Common uart2wb command encoding. The sub class provides _transfer().
+    UartLink itself can be used to pack the commands without a link.
+    """
+
+    stats = None    # UartStats, set by enable_stats()
+
+    def __init__(self, addr_byte, data_byte, max_repeat=RUN_MAX):
+        """
+        Args:
+            addr_byte: number of address byte
+            data_byte: number of data byte
+            max_repeat: max number of words of a repeat run in the compressed write
+        """
+        self.addr_byte = addr_byte
+        self.data_byte = data_byte
+        self.max_repeat = max_repeat
+
+    def enable_stats(self, baud_rate=None):
+        self.stats = UartStats(baud_rate)
+        return self.stats
+
+    def frame_len(self, cmd):
+        """
+        Number of bytes of a command frame (including the command byte).
+        Not supported by the compressed write, use frame_end() instead.
+        """
+        if cmd == CMD_READ:
+            return 1 + self.addr_byte
+        if cmd == CMD_WRITE:
+            return 1 + self.addr_byte + self.data_byte
+        if cmd in (CMD_RST_A, CMD_RST_D):
+            return 1
+        raise ValueError(f"Unsupported command {hex(cmd)}")
+
+    def frame_end(self, buf, pos=0):
+        """
+        End position of the command frame starting at buf[pos]. None if the frame is incomplete
+        """
+        if buf[pos] != CMD_ZWRITE:
+            end = pos + self.frame_len(buf[pos])
+            return end if end <= len(buf) else None
+        # walk through the runs until the end header
+        pos += 1 + self.addr_byte
+        while pos < len(buf):
+            header = buf[pos]
+            if header & RUN_MAX == 0:
+                return pos + 1
+            pos += 1 + self.data_byte * (1 if header & RUN_REPEAT else header & RUN_MAX)
+        return None
+
+    def pack_write(self, addr, data):
+        return bytes([CMD_WRITE]) + addr.to_bytes(self.addr_byte, byteorder='little') + \
+               data.to_bytes(self.data_byte, byteorder='little')
+
+    def pack_read(self, addr):
+        return bytes([CMD_READ]) + addr.to_bytes(self.addr_byte, byteorder='little')
+
+    def pack_rst(self, rst=True):
+        return bytes([CMD_RST_A if rst else CMD_RST_D])
+
+    def pack_image(self, addr, image):
+        """
+        Pack a memory image into write commands. addr is a byte address so it
+        increases by data_byte for each word.
         """
-        self.ser = serial.Serial(port=self.com_port, baudrate=self.baud_rate, timeout=1)
+        return b''.join(self.pack_write(addr + i * self.data_byte, data) for i, data in enumerate(image))
+
+    def pack_zimage(self, addr, image):
+        """
+        Pack a memory image into a single compressed write command
+        """
+        return bytes([CMD_ZWRITE]) + addr.to_bytes(self.addr_byte, byteorder='little') + \
+               compress_image(image, self.data_byte, self.max_repeat)
+
+    def unpack_write(self, frame):
+        """
+        Get the (addr, data) of a write command frame
+        """
+        addr = int.from_bytes(frame[1:1+self.addr_byte], byteorder='little')
+        data = int.from_bytes(frame[1+self.addr_byte:], byteorder='little')
+        return addr, data
+
+    def transfer(self, tx, rx_len=0):
+        """
+        Send the command frames in tx and return the rx_len bytes of read data
+        """
+        if not self.stats:
+            return self._transfer(tx, rx_len)
+        start = time.perf_counter()
+        rdata = self._transfer(tx, rx_len)
+        # a single command is recorded by its name, anything else as a batch
+        name = CMD_NAME.get(tx[0], 'batch') if len(tx) and self.frame_end(tx) == len(tx) else 'batch'
+        self.stats.record(name, time.perf_counter() - start)
+        return rdata
+
+    def _transfer(self, tx, rx_len):
+        raise NotImplementedError
 
     def write_cmd(self, addr, data, msg=False):
         """
         Process write command
         """
-        cmd = 2 # WRITE CMD = 2
-        self.ser.write(cmd.to_bytes(1, byteorder='little'))
-        self.ser.write(addr.to_bytes(self.addr_byte, byteorder='little'))
-        self.ser.write(data.to_bytes(self.data_byte, byteorder='little'))
+        self.transfer(self.pack_write(addr, data))
         if msg:
-            print("[Write] Address = {hex(addr)}, Write data = {hex(data)}")
+            print(f"[Write] Address = {hex(addr)}, Write data = {hex(data)}")
 
     def read_cmd(self, addr, msg=False):
         """
         Process read command
         """
-        cmd = 1 # READ CMD = 1
-        self.ser.write(cmd.to_bytes(1, byteorder='little'))
-        self.ser.write(addr.to_bytes(self.addr_byte, byteorder='little'))
-        rdata_bytes = self.ser.read(self.data_byte)
+        rdata_bytes = self.transfer(self.pack_read(addr), self.data_byte)
         rdata = int.from_bytes(rdata_bytes, byteorder='little')
         if msg:
             print(f"[Read] Address = {hex(addr)}, read data = {hex(rdata)}")
@@ -140,21 +432,274 @@ class UartHost:
         """
         if msg:
             print(f"[RST] {'Assert' if rst else 'De-assert'} the reset")
-        cmd = 0xFE if rst else 0xFF
-        self.ser.write(cmd.to_bytes(1, byteorder='little'))
+        self.transfer(self.pack_rst(rst))
 
     def get_addr_byte(self):
         return self.addr_byte
 
+class UartHost(UartLink):
+    """
+    Class to interact with the Uart module in target FPGA
+    """
+
+    def __init__(self, config_file='config.json', com_port=None):
+        """
+        Args:
+            config_file: config file
+            com_port: overrides the com_port in the config file
+        """
+        self.config_file=config_file
+        config = load_config(config_file)
+        super().__init__(config['addr_byte'], config['data_byte'], config.get('max_repeat', RUN_MAX))
+        self.com_port  = config['com_port']
+        self.baud_rate = config['baud_rate']
+        if com_port:
+            self.com_port = com_port
+        self._open_serial()
+
+    def _open_serial(self):
+        """
+        Open the serial port
+        """
+        # imported here so the daemon clients do not need pyserial
+        import serial
+        # exclusive so a second script (or daemon) can not open the port while it is in use
+        self.ser = serial.Serial(port=self.com_port, baudrate=self.baud_rate, timeout=1, exclusive=True)
+
+    def _transfer(self, tx, rx_len):
+        """
+        Send the command frames in tx and return the read data.
+
+        All the frames up to and including a read are sent with a single write.
+        uart2wb drops the bytes received while it sends back the read data, so the
+        next frames are only sent after the read data has been received.
+        """
+        rdata = bytearray()
+        start = 0
+        pos = 0
+        while pos < len(tx):
+            cmd = tx[pos]
+            pos = self.frame_end(tx, pos)
+            if pos is None:
+                raise ValueError("Incomplete command frame")
+            if cmd == CMD_READ or pos >= len(tx):
+                self._write(tx[start:pos])
+                start = pos
+                if cmd == CMD_READ:
+                    # pad with zero on timeout to keep the following reads aligned
+                    rdata += self._read(self.data_byte).ljust(self.data_byte, b'\x00')
+        return bytes(rdata[:rx_len])
+
+    def _write(self, data):
+        start = time.perf_counter()
+        self.ser.write(data)
+        if self.stats:
+            # write() returns once the data is buffered by the OS. Wait for it to be sent
+            # so the write time covers the time on the wire
+            self.ser.flush()
+            self.stats.record_write(len(data), time.perf_counter() - start)
+
+    def _read(self, size):
+        start = time.perf_counter()
+        data = self.ser.read(size)
+        if self.stats:
+            self.stats.record_read(len(data), time.perf_counter() - start, size)
+        return data
+
     def close(self):
         self.ser.close()
 
+class UartClient(UartLink):
+    """
+    Thin client of the UartDebug daemon. Provides the same interface as UartHost.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, max_repeat=RUN_MAX):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.sock.sendall(bytes([CMD_INFO]))
+        super().__init__(*self._recv(2), max_repeat)
+
+    def _recv(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("UartDebug daemon closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def _transfer(self, tx, rx_len):
+        """
+        Send the command frames in tx to the daemon and return the read data
+        """
+        start = time.perf_counter()
+        self.sock.sendall(tx)
+        if self.stats:
+            self.stats.record_write(len(tx), time.perf_counter() - start)
+            start = time.perf_counter()
+        rdata = self._recv(rx_len)
+        if self.stats and rx_len:
+            self.stats.record_read(len(rdata), time.perf_counter() - start, rx_len)
+        return rdata
+
+    def close(self):
+        self.sock.close()
+
+class UartServer:
+    """
+    UartDebug daemon. Owns the UartHost and serves the clients connected to the Unix socket.
+
+    Complete command frames from all the clients are queued per client. Each round takes
+    one frame from every client in turn (round-robin) so a busy client can not starve the
+    others, and the whole round is sent to the target as one batch.
+    """
+
+    MAX_BATCH = 4096    # max number of command bytes in a single batch
+
+    def __init__(self, uart, socket_path=DEFAULT_SOCKET):
+        self.uart = uart
+        self.socket_path = socket_path
+        self.sel = selectors.DefaultSelector()
+        self.clients = {}   # socket => [rx buffer, frame queue, is_open]
+        self.turn = 0       # first client to serve in the next round
+
+    def run(self):
+        if os.path.exists(self.socket_path):
+            # only remove a stale socket, never take over the socket of a running daemon
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"A daemon is already serving {self.socket_path}")
+            finally:
+                probe.close()
+        self.lsock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.lsock.bind(self.socket_path)
+        self.lsock.listen()
+        self.sel.register(self.lsock, selectors.EVENT_READ)
+        print(f"[Daemon] Serving {self.uart.com_port} on {self.socket_path}")
+        try:
+            while True:
+                busy = any(client[1] for client in self.clients.values())
+                for key, _ in self.sel.select(timeout=0 if busy else None):
+                    if key.fileobj is self.lsock:
+                        self._accept()
+                    else:
+                        self._receive(key.fileobj)
+                self._serve()
+        finally:
+            self.sel.close()
+            self.lsock.close()
+            os.unlink(self.socket_path)
+
+    def _accept(self):
+        sock, _ = self.lsock.accept()
+        self.clients[sock] = [bytearray(), deque(), True]
+        self.sel.register(sock, selectors.EVENT_READ)
+
+    def _receive(self, sock):
+        """
+        Receive data from a client and split it into command frames
+        """
+        client = self.clients[sock]
+        buf = client[0]
+        pos = 0
+        try:
+            # a client closing with unread replies resets the connection
+            data = sock.recv(65536)
+            if not data:
+                # keep the frames already received, the client is dropped once they are served
+                self.sel.unregister(sock)
+                client[2] = False
+                return
+            buf += data
+            while pos < len(buf):
+                # info is queued like the other frames so it is answered in request order
+                if buf[pos] == CMD_INFO:
+                    client[1].append(bytes([CMD_INFO]))
+                    pos += 1
+                    continue
+                end = self.uart.frame_end(buf, pos)
+                if end is None:
+                    break
+                client[1].append(bytes(buf[pos:end]))
+                pos = end
+        except (ValueError, OSError) as e:
+            print(f"[Daemon] Drop client: {e}")
+            self.sel.unregister(sock)
+            client[1].clear()
+            client[2] = False
+            return
+        del buf[:pos]
+
+    def _serve(self):
+        """
+        Send one round of frames to the target and dispatch the read data
+        """
+        socks = list(self.clients)
+        if not socks:
+            return
+        self.turn %= len(socks)
+        order = socks[self.turn:] + socks[:self.turn]
+        self.turn += 1
+        batch = bytearray()
+        replies = []    # (socket, command) of the read and info frames, in request order
+        for sock in order:
+            queue = self.clients[sock][1]
+            if queue and len(batch) < self.MAX_BATCH:
+                self._take(sock, queue.popleft(), batch, replies)
+        if batch or replies:
+            # keep draining writes from the same round while no one is waiting for read data
+            for sock in order:
+                queue = self.clients[sock][1]
+                while queue and queue[0][0] != CMD_READ and len(batch) < self.MAX_BATCH:
+                    self._take(sock, queue.popleft(), batch, replies)
+            size = self.uart.data_byte
+            nread = sum(1 for _, cmd in replies if cmd == CMD_READ)
+            rdata = self.uart.transfer(bytes(batch), size * nread) if batch else b''
+            pos = 0
+            for sock, cmd in replies:
+                if cmd == CMD_INFO:
+                    reply = bytes([self.uart.addr_byte, self.uart.data_byte])
+                else:
+                    reply = rdata[pos:pos+size]
+                    pos += size
+                try:
+                    sock.sendall(reply)
+                except OSError:
+                    pass
+        # drop the closed clients once all their frames are served
+        for sock in socks:
+            if not self.clients[sock][2] and not self.clients[sock][1]:
+                del self.clients[sock]
+                sock.close()
+
+    def _take(self, sock, frame, batch, replies):
+        """
+        Add a frame to the batch. The info frame is answered by the daemon and not sent to the target.
+        """
+        if frame[0] != CMD_INFO:
+            batch += frame
+        if frame[0] in (CMD_READ, CMD_INFO):
+            replies.append((sock, frame[0]))
+
 class Interpreter():
     """
     Interpreter logic. Entering a infinite loop to process incoming command or process a single command.
     """
-    def __init__(self, uart):
+
+    SCRIPT_BATCH = 4096     # max number of command bytes in a single batch in script mode
+
+    def __init__(self, uart, compress=False):
+        """
+        Args:
+            compress: program the images with the compressed write command
+        """
         self.uart = uart
+        self.compress = compress
 
     def run(self):
         task = {
@@ -163,6 +708,7 @@ class Interpreter():
             'read':    lambda args: self.proc_read(*args),
             'write':   lambda args: self.proc_write(*args),
             'program': lambda args: self.proc_program(*args),
+            'stats':   lambda args: self.proc_stats(*args),
         }
         while True:
             cmd, args = self.parse_cmd()
@@ -171,6 +717,84 @@ class Interpreter():
             except KeyError:
                 print("Unsupported command. You can type help to see all the available commands")
 
+    def run_script(self, FH):
+        """
+        Run a script non-interactively and print the result of each command as a JSON line.
+
+        The whole script is parsed before anything is sent to the target. Commands are then
+        packed into batches so a run of writes (and the reads following them) is sent in a
+        single transfer instead of one round trip per command.
+        """
+        cmds = []
+        errors = []
+        for lineno, line in enumerate(FH, 1):
+            line = line.split('#')[0].strip()
+            if not line:
+                continue
+            field = line.split()
+            cmd, args = field[0], field[1:]
+            try:
+                if cmd == 'exit':
+                    break
+                elif cmd == 'write' and len(args) == 2:
+                    addr = self._check_addr(self._str2int(args[0]))
+                    cmds.append((lineno, cmd, addr, self._check_data(self._str2int(args[1]))))
+                elif cmd == 'read' and len(args) == 1:
+                    cmds.append((lineno, cmd, self._check_addr(self._str2int(args[0])), None))
+                elif cmd == 'program' and len(args) == 2:
+                    addr = self._check_addr(self._str2int(args[0]))
+                    image = load_image(args[1])
+                    self._check_addr(addr + max(len(image) - 1, 0) * self.uart.data_byte)
+                    for data in image:
+                        self._check_data(data)
+                    cmds.append((lineno, cmd, addr, image))
+                else:
+                    raise ValueError(f"Unsupported command: {line}")
+            except (ValueError, OSError) as e:
+                errors.append({'line': lineno, 'error': str(e)})
+        # do not touch the target if the script is not valid
+        if errors:
+            for error in errors:
+                print(json.dumps(error))
+            return False
+        tx = bytearray()
+        batch = []
+        for lineno, cmd, addr, data in cmds:
+            if cmd == 'write':
+                tx += self.uart.pack_write(addr, data)
+            elif cmd == 'read':
+                tx += self.uart.pack_read(addr)
+            else:
+                tx += self.uart.pack_rst(True) + self.pack_program(addr, data) + self.uart.pack_rst(False)
+            batch.append((lineno, cmd, addr, data))
+            if len(tx) >= self.SCRIPT_BATCH:
+                self._run_batch(tx, batch)
+                tx.clear()
+                batch.clear()
+        self._run_batch(tx, batch)
+        return True
+
+    def _run_batch(self, tx, batch):
+        """
+        Send a batch of commands and print the results
+        """
+        if not batch:
+            return
+        size = self.uart.data_byte
+        nread = sum(1 for cmd in batch if cmd[1] == 'read')
+        rdata = self.uart.transfer(bytes(tx), nread * size)
+        pos = 0
+        for lineno, cmd, addr, data in batch:
+            result = {'line': lineno, 'cmd': cmd, 'addr': addr}
+            if cmd == 'read':
+                data = int.from_bytes(rdata[pos:pos+size], byteorder='little')
+                pos += size
+            if cmd == 'program':
+                result['words'] = len(data)
+            else:
+                result['data'] = data
+            print(json.dumps(result))
+
     def parse_cmd(self):
         line = input("> ").strip()
         field = line.split(' ')
@@ -193,25 +817,52 @@ class Interpreter():
         # convert addr string to value. Only support hex or dec value
         addr = self._str2int(addr)
         print(f"Program file to target FPGA. Starting address {addr}. File: {file}")
-        addr_byte = self.uart.get_addr_byte()
-        with open(file, 'r') as FH:
-            lines = FH.readlines()
-            # check if the the line is using binary or hex
-            for line in lines:
-                data = line.strip()
-                is_binary = self._is_binary(data)
-                if is_binary:
-                    data = int(data, 2)
-                self.proc_write(addr, data)
-                # update addr, the addr here is byte address
-                addr = addr + addr_byte
+        # send the whole image as a single batch of write commands
+        image = load_image(file)
+        tx = self.pack_program(addr, image)
+        if self.compress:
+            size = len(image) * self.uart.frame_len(CMD_WRITE)
+            print(f"Compressed {len(image)} words: {size} -> {len(tx)} bytes ({size / len(tx):.2f}x)")
+        self.uart.transfer(tx)
         print(f"De-assert reset")
         self.uart.rst_cmd(False, False)
 
+    def pack_program(self, addr, image):
+        """
+        Pack an image into write commands, or a compressed write command
+        """
+        if self.compress:
+            return self.uart.pack_zimage(addr, image)
+        return self.uart.pack_image(addr, image)
+
+    def proc_stats(self, action=None):
+        if not self.uart.stats:
+            print("Statistics are not enabled. Start the script with --stats <file>")
+        elif action == 'reset':
+            self.uart.stats.reset()
+        else:
+            print(self.uart.stats.summary())
+
     def proc_exit(self):
         self.uart.close()
         exit(0)
 
+    def _check_addr(self, addr):
+        """
+        Check that the address fits in addr_byte bytes
+        """
+        if not 0 <= addr < 1 << 8 * self.uart.addr_byte:
+            raise ValueError(f"Address {hex(addr)} out of range for {self.uart.addr_byte} address byte")
+        return addr
+
+    def _check_data(self, data):
+        """
+        Check that the data fits in data_byte bytes
+        """
+        if not 0 <= data < 1 << 8 * self.uart.data_byte:
+            raise ValueError(f"Data {hex(data)} out of range for {self.uart.data_byte} data byte")
+        return data
+
     def _str2int(self, s):
         """
         Convert string to integer. Support decimal or hexadecimal
@@ -226,11 +877,303 @@ class Interpreter():
         else:
             raise ValueError
 
-    def _is_binary(self, s):
+class Watcher:
+    """
+    Poll a list of addresses and store the samples in a fixed size ring buffer.
+
+    Each sample is a record of the host timestamp (float64, seconds since epoch) followed by
+    the value of each address. The records are packed in place into a preallocated buffer
+    and, if a file is given, streamed to a NumPy .npy file:
+        samples = numpy.load(file); samples['time'], samples['value'][:, i]
+    """
+
+    def __init__(self, uart, addrs, capacity=65536, file=None):
+        # half of the ring is written out at a time
+        if capacity < 2:
+            raise ValueError("Watcher capacity must be at least 2")
+        self.uart = uart
+        self.addrs = addrs
+        self.capacity = capacity
+        size = uart.data_byte
+        # numpy only has 1, 2, 4 and 8 byte integers
+        self.vsize = size if size in (1, 2, 4, 8) else 1 << (size - 1).bit_length()
+        self.rsize = 8 + self.vsize * len(addrs)
+        self.buf = bytearray(self.rsize * capacity)
+        self.count = 0      # number of samples taken
+        self.flushed = 0    # number of samples written to the file
+        # all the read commands of a sample, packed once
+        self.tx = b''.join(uart.pack_read(addr) for addr in addrs)
+        self.file = None
+        if file:
+            self.file = open(file, 'wb')
+            self._write_header()
+
+    def _write_header(self):
         """
-        Check if a string represent binary number
+        Write the .npy header. The header has a fixed length so it can be rewritten with the new shape.
         """
-        return set(s).issubset({'0', '1'})
+        descr = f"[('time', '<f8'), ('value', '<u{self.vsize}', ({len(self.addrs)},))]"
+        header = f"{{'descr': {descr}, 'fortran_order': False, 'shape': ({self.flushed},), }}"
+        # 10 byte preamble + 118 byte header = 128 byte, the data is aligned to 64 bytes as required by .npy
+        header = header.ljust(117) + '\n'
+        self.file.seek(0)
+        self.file.write(b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, byteorder='little') + header.encode())
+        self.file.seek(0, os.SEEK_END)
+
+    def sample(self):
+        """
+        Take one sample of all the addresses
+        """
+        now = time.time()
+        rdata = self.uart.transfer(self.tx, self.uart.data_byte * len(self.addrs))
+        pos = (self.count % self.capacity) * self.rsize
+        struct.pack_into('<d', self.buf, pos, now)
+        if self.vsize == self.uart.data_byte:
+            self.buf[pos+8:pos+self.rsize] = rdata
+        else:
+            for i in range(len(self.addrs)):
+                off = pos + 8 + i * self.vsize
+                self.buf[off:off+self.uart.data_byte] = rdata[i*self.uart.data_byte:(i+1)*self.uart.data_byte]
+        self.count += 1
+        # write out before the samples are overwritten
+        if self.file and self.count - self.flushed >= self.capacity // 2:
+            self.flush()
+
+    def latest(self):
+        """
+        Return the values of the latest sample
+        """
+        pos = ((self.count - 1) % self.capacity) * self.rsize + 8
+        return [int.from_bytes(self.buf[pos+i*self.vsize:pos+(i+1)*self.vsize], byteorder='little')
+                for i in range(len(self.addrs))]
+
+    def flush(self):
+        """
+        Write the new samples to the file
+        """
+        if not self.file or self.count == self.flushed:
+            return
+        start = self.flushed % self.capacity
+        end = self.count % self.capacity
+        view = memoryview(self.buf)
+        if start < end:
+            self.file.write(view[start*self.rsize:end*self.rsize])
+        else:
+            self.file.write(view[start*self.rsize:])
+            self.file.write(view[:end*self.rsize])
+        view.release()
+        self.flushed = self.count
+        self._write_header()
+        self.file.flush()
+
+    def run(self, interval=0, count=0, report=1.0):
+        """
+        Sample every interval seconds (0 = as fast as possible) until count samples
+        are taken (0 = forever) or Ctrl-C. Print the latest values every report seconds.
+        """
+        start = time.perf_counter()
+        deadline = start
+        next_report = start + report
+        try:
+            while not count or self.count < count:
+                self.sample()
+                now = time.perf_counter()
+                if now >= next_report:
+                    self.flush()
+                    rate = self.count / (now - start)
+                    values = ' '.join(hex(v) for v in self.latest())
+                    print(f"[Watch] {self.count} samples, {rate:.1f} samples/s. {values}")
+                    next_report += report
+                if interval:
+                    # schedule from the start so the sample spacing does not drift
+                    deadline += interval
+                    if deadline > now:
+                        time.sleep(deadline - now)
+        except KeyboardInterrupt:
+            pass
+        self.flush()
+        elapsed = time.perf_counter() - start
+        print(f"[Watch] {self.count} samples in {elapsed:.3f}s")
+
+    def close(self):
+        if self.file:
+            self.flush()
+            self.file.close()
+
+def _fleet_worker(job):
+    """
+    Program and verify one board. Runs in a worker process of program_fleet().
+    """
+    port, config_file, shm_name, size, zsize, verify = job
+    result = {'port': port, 'words': 0, 'failures': 0, 'time': 0.0, 'bytes': 0, 'error': None}
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = shm.buf[:size]
+    # the compressed write command follows the write commands, if any
+    tx = shm.buf[size:size+zsize] if zsize else frames
+    uart = None
+    try:
+        uart = UartHost(config_file, port)
+        frame_len = uart.frame_len(CMD_WRITE)
+        start = time.perf_counter()
+        uart.rst_cmd(True)
+        try:
+            uart.transfer(tx)
+            # wait for the image to leave the host so the throughput is not overestimated
+            uart.ser.flush()
+            result['words'] = size // frame_len
+            result['bytes'] = len(tx)
+            if verify:
+                for pos in range(0, size, frame_len):
+                    addr, data = uart.unpack_write(frames[pos:pos+frame_len])
+                    if uart.read_cmd(addr) != data:
+                        result['failures'] += 1
+                result['bytes'] += (1 + uart.addr_byte + uart.data_byte) * result['words']
+        finally:
+            # never leave the board in reset
+            uart.rst_cmd(False)
+        result['time'] = time.perf_counter() - start
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        if uart:
+            uart.close()
+        tx.release()
+        frames.release()
+        shm.close()
+    return result
+
+def program_fleet(ports, file, addr=0, verify=True, config_file='config.json', compress=False):
+    """
+    Program the same image to all the boards in parallel, one worker process per board.
+
+    The image is parsed and packed into write commands once and shared with the workers
+    through shared memory. With compress, the boards are programmed with the compressed
+    write command and the write commands are only used to verify the image.
+
+    Args:
+        ports: list of com ports. glob pattern (e.g. /dev/ttyUSB*) is supported
+        file: image file
+        addr: start address
+        verify: read back and compare the image after programming
+        compress: program with the compressed write command
+    Return:
+        list of the per board result
+    """
+    expanded = []
+    for port in ports:
+        matches = sorted(glob.glob(port)) if glob.has_magic(port) else [port]
+        expanded += [p for p in matches if p not in expanded]
+    if not expanded:
+        print(f"[Fleet] No com port matches {' '.join(ports)}")
+        return []
+    # only the config is needed to pack the image, the serial port is not opened here
+    config = load_config(config_file)
+    packer = UartLink(config['addr_byte'], config['data_byte'], config.get('max_repeat', RUN_MAX))
+    baud_rate = config['baud_rate']
+    image = load_image(file)
+    frames = packer.pack_image(addr, image)
+    ztx = packer.pack_zimage(addr, image) if compress else b''
+    shm = shared_memory.SharedMemory(create=True, size=max(len(frames) + len(ztx), 1))
+    shm.buf[:len(frames)] = frames
+    shm.buf[len(frames):len(frames)+len(ztx)] = ztx
+    print(f"[Fleet] Program {file} ({len(image)} words) to {len(expanded)} boards. Starting address {addr}")
+    if compress:
+        print(f"[Fleet] Compressed {len(image)} words: {len(frames)} -> {len(ztx)} bytes "
+              f"({len(frames) / len(ztx):.2f}x)")
+    jobs = [(port, config_file, shm.name, len(frames), len(ztx), verify) for port in expanded]
+    results = []
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(len(jobs)) as pool:
+            for result in pool.imap_unordered(_fleet_worker, jobs):
+                results.append(result)
+                if result['error']:
+                    print(f"[Fleet] {result['port']}: FAILED - {result['error']}")
+                    continue
+                rate = result['bytes'] / result['time'] if result['time'] else 0
+                status = 'PASS' if result['failures'] == 0 else f"FAILED - {result['failures']} mismatches"
+                print(f"[Fleet] {result['port']}: {status}. {result['words']} words in {result['time']:.3f}s, "
+                      f"{rate:.0f} B/s ({100 * rate * 10 / baud_rate:.1f}% of the baud rate)")
+    finally:
+        shm.close()
+        shm.unlink()
+    elapsed = time.perf_counter() - start
+    serial_time = sum(r['time'] for r in results)
+    failed = [r for r in results if r['error'] or r['failures']]
+    print(f"[Fleet] {len(results) - len(failed)}/{len(results)} boards passed in {elapsed:.3f}s. "
+          f"Speedup over one at a time: {serial_time / elapsed if elapsed else 0:.2f}x")
+    return results
+
+def load_config(config_file='config.json'):
+    """
+    Read the config file
+    """
+    with open(config_file, 'r') as FH:
+        return json.load(FH)
+
+def load_image(file):
+    """
+    Read a memory image file. One word per line, in binary, decimal or hexadecimal (0x).
+    """
+    image = []
+    with open(file, 'r') as FH:
+        for line in FH:
+            data = line.strip()
+            if not data:
+                continue
+            # check if the the line is using binary or hex
+            if set(data).issubset({'0', '1'}):
+                image.append(int(data, 2))
+            elif data.lower().startswith("0x"):
+                image.append(int(data, 16))
+            else:
+                image.append(int(data))
+    return image
+
+def compress_image(image, data_byte, max_repeat=RUN_MAX):
+    """
+    Run length encode a memory image for the compressed write command.
+
+    Each run starts with a header byte. Bit 6:0 is the number of words (1 - 127). Bit 7 = 1 is a
+    repeat run followed by the word to repeat, bit 7 = 0 is followed by the literal words. A header
+    with 0 words ends the command. Words are little endian with data_byte bytes.
+
+    uart2wb writes a repeat run while the next bytes arrive and can only hold one of them, so
+    max_repeat limits the repeat run to what the target writes within 2 UART byte time.
+    """
+    if not 1 <= max_repeat <= RUN_MAX:
+        raise ValueError(f"max_repeat must be within 1 - {RUN_MAX}")
+    out = bytearray()
+    literal = []
+    # a repeat run of 2 words only pays off when the word is wider than the run header
+    min_repeat = 2 if data_byte > 1 else 3
+
+    def flush_literal():
+        if literal:
+            out.append(len(literal))
+            for word in literal:
+                out.extend(word.to_bytes(data_byte, byteorder='little'))
+            literal.clear()
+
+    pos = 0
+    while pos < len(image):
+        word = image[pos]
+        num = 1
+        while pos + num < len(image) and image[pos + num] == word and num < max_repeat:
+            num += 1
+        if num >= min_repeat:
+            flush_literal()
+            out.append(RUN_REPEAT | num)
+            out.extend(word.to_bytes(data_byte, byteorder='little'))
+            pos += num
+        else:
+            literal.append(word)
+            pos += 1
+            if len(literal) == RUN_MAX:
+                flush_literal()
+    flush_literal()
+    out.append(0)
+    return bytes(out)
 
 def parse_args():
     parser = argparse.ArgumentParser(prog='UartDebug.py', description=Usage, formatter_class=argparse.RawTextHelpFormatter)
@@ -240,9 +1183,65 @@ def parse_args():
     parser.add_argument('addr', nargs='?', type=lambda x: int(x, 0), default=0,
         help='Start address (hex or dec). Defaults to 0.'
     )
+    parser.add_argument('-s', '--script', metavar='SCRIPT',
+        help='Run the commands in SCRIPT (- for stdin) and print the results as JSON lines'
+    )
+    parser.add_argument('-w', '--watch', nargs='+', metavar='ADDR', type=lambda x: int(x, 0),
+        help='Poll the addresses and log the samples'
+    )
+    parser.add_argument('--interval', type=float, default=0,
+        help='Sample interval in second in watch mode. Defaults to 0 (as fast as possible).'
+    )
+    parser.add_argument('--count', type=int, default=0,
+        help='Number of samples in watch mode. Defaults to 0 (until Ctrl-C).'
+    )
+    parser.add_argument('--ring', type=int, default=65536,
+        help='Number of samples in the watch ring buffer (at least 2)'
+    )
+    parser.add_argument('--log', metavar='FILE',
+        help='Stream the watch samples to FILE (.npy)'
+    )
+    parser.add_argument('-d', '--daemon', action='store_true',
+        help='Run as a daemon serving the clients on the Unix socket'
+    )
+    parser.add_argument('-c', '--client', action='store_true',
+        help='Connect to a running daemon instead of opening the serial port'
+    )
+    parser.add_argument('-f', '--fleet', nargs='+', metavar='PORT',
+        help='Program the file to all the ports in parallel (glob pattern supported)'
+    )
+    parser.add_argument('-z', '--compress', action='store_true',
+        help='Program the file with the compressed write command'
+    )
+    parser.add_argument('--no-verify', action='store_true',
+        help='Do not read back the image in fleet mode'
+    )
+    parser.add_argument('--stats', metavar='FILE',
+        help='Collect the link statistics and export them to FILE (json) at exit'
+    )
+    parser.add_argument('--socket',
+        help='Unix socket of the daemon. Overrides the config file.'
+    )
     args = parser.parse_args()
+    if args.ring < 2:
+        parser.error("--ring must be at least 2")
     return args
 
+def get_socket_path(args, config_file='config.json'):
+    """
+    Get the daemon socket path from the command line or the config file
+    """
+    if args.socket:
+        return args.socket
+    return load_config(config_file).get('socket', DEFAULT_SOCKET)
+
+def enable_stats(uart, file):
+    """
+    Enable the link statistics and export them to file at exit
+    """
+    stats = uart.enable_stats(getattr(uart, 'baud_rate', None))
+    atexit.register(stats.dump, file)
+
 def main():
     args = parse_args()
     try:
@@ -250,8 +1249,49 @@ def main():
             return
     except AttributeError:
         pass
-    uart_host = UartHost('config.json')
-    interpreter = Interpreter(uart_host)
+    if args.fleet:
+        if not args.file:
+            print("Fleet mode requires a file to program")
+            sys.exit(1)
+        results = program_fleet(args.fleet, args.file, args.addr, not args.no_verify, compress=args.compress)
+        failed = [r for r in results if r['error'] or r['failures']]
+        sys.exit(1 if failed or not results else 0)
+    if args.daemon:
+        server = UartServer(UartHost('config.json'), get_socket_path(args))
+        if args.stats:
+            enable_stats(server.uart, args.stats)
+        # exit cleanly (and remove the socket) when killed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            server.run()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            print(f"[Daemon] {e}")
+            server.uart.close()
+            sys.exit(1)
+        server.uart.close()
+        return
+    if args.client:
+        uart_host = UartClient(get_socket_path(args), load_config().get('max_repeat', RUN_MAX))
+    else:
+        uart_host = UartHost('config.json')
+    if args.stats:
+        enable_stats(uart_host, args.stats)
+    interpreter = Interpreter(uart_host, args.compress)
+    if args.watch:
+        watcher = Watcher(uart_host, args.watch, args.ring, args.log)
+        watcher.run(args.interval, args.count)
+        watcher.close()
+        interpreter.proc_exit()
+    if args.script:
+        if args.script == '-':
+            ok = interpreter.run_script(sys.stdin)
+        else:
+            with open(args.script, 'r') as FH:
+                ok = interpreter.run_script(FH)
+        uart_host.close()
+        sys.exit(0 if ok else 1)
     if args.file:
         file = args.file
         addr = args.addr
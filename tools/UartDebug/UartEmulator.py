@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+
+"""
+Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+
+Project: Uart Controller
+Author: Heqing Huang
+Date Created: 10/19/2026
+"""
+
+Usage = \
+"""
+------------------------------------------------------------------------------------------------------------------------
+UartEmulator(1)
+
+NAME
+    UartEmulator.py - Emulate uart2wb targets on pseudo terminals
+
+SYNOPSIS
+    UartEmulator.py [-n num] [--baud baud] [--link prefix]
+
+DESCRIPTION
+    This python script creates one or more pseudo terminals (pty). Each pty
+    behaves like a FPGA running the uart2wb_ram example: it executes the
+    uart2wb read/write/compressed write/reset commands on an emulated RAM. It can be used to
+    test UartDebug.py without FPGA boards, for example the fleet mode:
+
+        ./UartEmulator.py -n 4 --link /tmp/ttyEMU &
+        ./UartDebug.py test.hex -f '/tmp/ttyEMU*'
+
+    The addr_byte and data_byte are taken from config.json.
+
+OPTIONS
+    -n num
+        Number of emulated targets (default 1).
+
+    --baud baud
+        Emulate the UART wire time of the given baud rate (8-N-1). 0 means
+        run as fast as possible. Default is the baud_rate in config.json.
+
+    --link prefix
+        Create symbolic links <prefix>0, <prefix>1, ... to the ptys.
+
+LIMITATIONS
+    The emulator does not drop the bytes received while sending the read data.
+
+AUTHOR
+    Heqing Huang
+
+------------------------------------------------------------------------------------------------------------------------
+"""
+
+import os
+import pty
+import tty
+import json
+import time
+import sys
+import signal
+import argparse
+import threading
+
+# uart2wb commands
+CMD_READ  = 0x01
+CMD_WRITE = 0x02
+CMD_ZWRITE = 0x03
+CMD_RST_A = 0xFE
+CMD_RST_D = 0xFF
+
+class UartEmulator:
+    """
+    Emulate a uart2wb target on a pty
+    """
+
+    def __init__(self, addr_byte=1, data_byte=2, baud=0):
+        self.addr_byte = addr_byte
+        self.data_byte = data_byte
+        # time of each byte on the wire (start + 8 data + stop)
+        self.byte_time = 10 / baud if baud else 0
+        self.ram = {}
+        self.rst = False
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+    def run(self):
+        buf = bytearray()
+        while True:
+            data = os.read(self.master, 4096)
+            self._wire_delay(len(data))
+            buf += data
+            pos = 0
+            while pos < len(buf):
+                cmd = buf[pos]
+                if cmd in (CMD_RST_A, CMD_RST_D):
+                    self.rst = cmd == CMD_RST_A
+                    pos += 1
+                    continue
+                if cmd == CMD_ZWRITE:
+                    size = self._zwrite(buf, pos)
+                    if size is None:
+                        break
+                    pos += size
+                    continue
+                size = 1 + self.addr_byte + (self.data_byte if cmd == CMD_WRITE else 0)
+                if pos + size > len(buf):
+                    break
+                addr = int.from_bytes(buf[pos+1:pos+1+self.addr_byte], byteorder='little')
+                if cmd == CMD_WRITE:
+                    self.ram[addr] = int.from_bytes(buf[pos+1+self.addr_byte:pos+size], byteorder='little')
+                else:
+                    # any other command is treated as a read by uart2wb
+                    self._wire_delay(self.data_byte)
+                    os.write(self.master, self.ram.get(addr, 0).to_bytes(self.data_byte, byteorder='little'))
+                pos += size
+            del buf[:pos]
+
+    def _zwrite(self, buf, pos):
+        """
+        Expand a compressed write command. Return the command size, None if it is incomplete.
+        """
+        start = pos
+        pos += 1 + self.addr_byte
+        if pos > len(buf):
+            return None
+        addr = int.from_bytes(buf[start+1:pos], byteorder='little')
+        writes = []
+        while pos < len(buf):
+            header = buf[pos]
+            num = header & 0x7F
+            pos += 1
+            if num == 0:
+                for addr, data in writes:
+                    self.ram[addr] = data
+                return pos - start
+            nword = 1 if header & 0x80 else num
+            if pos + nword * self.data_byte > len(buf):
+                return None
+            for i in range(num):
+                word = 0 if header & 0x80 else i
+                data = int.from_bytes(buf[pos+word*self.data_byte:pos+(word+1)*self.data_byte], byteorder='little')
+                writes.append((addr, data))
+                addr += self.data_byte
+            pos += nword * self.data_byte
+        return None
+
+    def _wire_delay(self, num):
+        if self.byte_time:
+            time.sleep(num * self.byte_time)
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='UartEmulator.py', description=Usage, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('-n', type=int, default=1,
+        help='Number of emulated targets'
+    )
+    parser.add_argument('--baud', type=int,
+        help='Emulated baud rate. 0 = no wire delay. Defaults to the config file.'
+    )
+    parser.add_argument('--link',
+        help='Create symbolic links <prefix>0, <prefix>1, ... to the ptys'
+    )
+    args = parser.parse_args()
+    return args
+
+def main():
+    args = parse_args()
+    with open('config.json', 'r') as file:
+        config = json.load(file)
+    baud = config['baud_rate'] if args.baud is None else args.baud
+    emulators = [UartEmulator(config['addr_byte'], config['data_byte'], baud) for _ in range(args.n)]
+    links = []
+    # exit cleanly (and remove the links) when killed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    for i, emu in enumerate(emulators):
+        port = emu.port
+        if args.link:
+            port = f"{args.link}{i}"
+            if os.path.lexists(port):
+                os.unlink(port)
+            os.symlink(emu.port, port)
+            links.append(port)
+        print(port, flush=True)
+        threading.Thread(target=emu.run, daemon=True).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for link in links:
+            os.unlink(link)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+
+"""
+Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+
+Project: Uart Controller
+Author: Heqing Huang
+Date Created: 10/19/2026
+
+Daemon test against an emulated target (UartEmulator.py)
+NUM clients read and write their own addresses through the daemon at the
+same time while another client sends reads and disconnects without reading
+the replies. Check that every client gets its own data back, that a second
+daemon can not take over the serial port or the socket and that the daemon
+keeps serving new clients.
+
+Usage: ./test_daemon.py  (or python3 -m pytest test_daemon.py)
+"""
+
+import os
+import sys
+import json
+import random
+import socket
+import tempfile
+import threading
+import time
+import subprocess
+
+from UartDebug import UartClient, CMD_INFO
+
+NUM   = 4       # number of clients
+WORDS = 32      # words written and read back by each client
+BAUD  = 115200  # emulated baud rate
+
+def client_job(sock_path, index, errors):
+    """
+    Write and read back WORDS words at the addresses owned by this client
+    """
+    try:
+        uart = UartClient(sock_path)
+        base = index * WORDS * uart.data_byte
+        data = [random.randint(0, 65535) for _ in range(WORDS)]
+        for i, word in enumerate(data):
+            addr = base + i * uart.data_byte
+            uart.write_cmd(addr, word)
+            # interleave single reads and batches of a write followed by reads
+            if i % 2:
+                if uart.read_cmd(addr) != word:
+                    errors.append(f"client {index}: mismatch at {hex(addr)}")
+            else:
+                rdata = uart.transfer(uart.pack_read(addr) + uart.pack_read(base), 2 * uart.data_byte)
+                expected = word.to_bytes(uart.data_byte, 'little') + data[0].to_bytes(uart.data_byte, 'little')
+                if rdata != expected:
+                    errors.append(f"client {index}: batch mismatch at {hex(addr)}")
+        uart.close()
+    except Exception as e:
+        errors.append(f"client {index}: {e}")
+
+def abrupt_job(sock_path):
+    """
+    Send reads and close the connection without reading all the replies
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(sock_path)
+    sock.sendall(bytes([CMD_INFO]) + bytes([0x01, 0x00, 0x00]) * 50)
+    # wait for the first replies so there is unread data when the connection is closed
+    sock.recv(2)
+    time.sleep(0.05)
+    sock.close()
+
+def wait_socket(path, proc, timeout=10):
+    deadline = time.time() + timeout
+    while not os.path.exists(path):
+        assert proc.poll() is None, "daemon exited"
+        assert time.time() < deadline, "daemon did not start"
+        time.sleep(0.05)
+
+def test_daemon():
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        sock_path = os.path.join(tmp, 'UartDebug.sock')
+        config = {'com_port': '', 'baud_rate': BAUD, 'addr_byte': 2, 'data_byte': 2, 'socket': sock_path}
+        with open(os.path.join(tmp, 'config.json'), 'w') as FH:
+            json.dump(config, FH)
+        # both the emulator and the daemon read config.json from their working directory
+        emulator = subprocess.Popen([sys.executable, os.path.join(here, 'UartEmulator.py'), '-n', '2',
+                                     '--baud', str(BAUD)], cwd=tmp, stdout=subprocess.PIPE, text=True)
+        daemon = None
+        try:
+            ports = [emulator.stdout.readline().strip() for _ in range(2)]
+            config['com_port'] = ports[0]
+            with open(os.path.join(tmp, 'config.json'), 'w') as FH:
+                json.dump(config, FH)
+            # same socket on the other port
+            other = os.path.join(tmp, 'other')
+            os.mkdir(other)
+            with open(os.path.join(other, 'config.json'), 'w') as FH:
+                json.dump(dict(config, com_port=ports[1]), FH)
+            daemon = subprocess.Popen([sys.executable, os.path.join(here, 'UartDebug.py'), '-d'], cwd=tmp,
+                                      stdout=subprocess.DEVNULL)
+            wait_socket(sock_path, daemon)
+            errors = []
+            threads = [threading.Thread(target=client_job, args=(sock_path, i, errors)) for i in range(NUM)]
+            threads.append(threading.Thread(target=abrupt_job, args=(sock_path,)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors, '\n'.join(errors)
+            assert daemon.poll() is None, "daemon exited"
+            # a second daemon can not take over the socket or the serial port
+            for cwd, args in ((tmp, ['--socket', os.path.join(tmp, 'other.sock')]), (other, [])):
+                second = subprocess.run([sys.executable, os.path.join(here, 'UartDebug.py'), '-d'] + args, cwd=cwd,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+                assert second.returncode != 0, f"second daemon started in {cwd}"
+            # a new client is still served after the abrupt disconnect
+            uart = UartClient(sock_path)
+            uart.write_cmd(0x1000, 0x1234)
+            assert uart.read_cmd(0x1000) == 0x1234
+            uart.close()
+        finally:
+            if daemon:
+                daemon.terminate()
+                daemon.wait()
+            emulator.terminate()
+            emulator.wait()
+
+if __name__ == '__main__':
+    test_daemon()
+    print("PASS")
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+"""
+Copyright 2025 by Heqing Huang (feipenghhq@gamil.com)
+
+Project: Uart Controller
+Author: Heqing Huang
+Date Created: 10/19/2026
+
+Fleet mode test against the emulated targets (UartEmulator.py)
+Program the same image to NUM boards paced at BAUD, with the write
+commands and with the compressed write command, and check that all the
+boards pass and that the parallel programming is at least NUM / 2 times
+faster than programming the boards one at a time.
+
+Usage: ./test_fleet.py  (or python3 -m pytest test_fleet.py)
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+import subprocess
+
+from UartDebug import program_fleet
+
+NUM   = 4       # number of emulated boards
+BAUD  = 115200  # emulated baud rate
+WORDS = 256     # image size
+
+def run_fleet(compress=False):
+    """
+    Program a random image with zero filled runs to NUM emulated boards and check the results
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'config.json')
+        with open(config_file, 'w') as FH:
+            json.dump({'com_port': '', 'baud_rate': BAUD, 'addr_byte': 2, 'data_byte': 2}, FH)
+        image = os.path.join(tmp, 'image.hex')
+        with open(image, 'w') as FH:
+            FH.write(''.join(f"{hex(random.randint(0, 65535) if i % 64 < 32 else 0)}\n" for i in range(WORDS)))
+        # the emulator reads config.json from its working directory
+        emulator = subprocess.Popen([sys.executable, os.path.join(here, 'UartEmulator.py'), '-n', str(NUM),
+                                     '--baud', str(BAUD), '--link', os.path.join(tmp, 'ttyEMU')],
+                                    cwd=tmp, stdout=subprocess.PIPE, text=True)
+        try:
+            # the emulator prints one line per target once it is ready
+            ports = [emulator.stdout.readline().strip() for _ in range(NUM)]
+            start = time.perf_counter()
+            results = program_fleet(ports, image, 0, True, config_file, compress)
+            elapsed = time.perf_counter() - start
+        finally:
+            emulator.terminate()
+            emulator.wait()
+    assert len(results) == NUM
+    for result in results:
+        assert result['error'] is None, f"{result['port']}: {result['error']}"
+        assert result['failures'] == 0, f"{result['port']}: {result['failures']} mismatches"
+        assert result['words'] == WORDS
+    # each board reports its own programming time: their sum is the time one at a time
+    serial_time = sum(r['time'] for r in results)
+    return serial_time, elapsed
+
+def check_speedup(serial_time, elapsed):
+    # the boards are programmed in parallel: expect at least half of the ideal speedup
+    assert serial_time / elapsed > NUM / 2, \
+        f"speedup {serial_time / elapsed:.2f}x below {NUM / 2}x: {serial_time:.3f}s serial, {elapsed:.3f}s parallel"
+
+def test_fleet():
+    serial_time, elapsed = run_fleet()
+    check_speedup(serial_time, elapsed)
+
+def test_fleet_compress():
+    serial_time, elapsed = run_fleet(compress=True)
+    check_speedup(serial_time, elapsed)
+
+if __name__ == '__main__':
+    test_fleet()
+    test_fleet_compress()
+    print("PASS")